@@ -41,7 +41,8 @@ async def search_messages(
         FROM analytics_marts.fct_messages fm
         JOIN analytics_marts.dim_channels dc ON fm.channel_key = dc.channel_key
         JOIN analytics_marts.dim_dates dd ON fm.date_key = dd.date_key
-        LEFT JOIN image_analysis.yolo_detections yd ON fm.message_id = yd.message_id
+        LEFT JOIN image_analysis.yolo_detections yd
+            ON yd.channel_name = dc.channel_name AND yd.message_id = fm.message_id
         WHERE fm.message_text ILIKE %s
         """
         
@@ -50,7 +50,8 @@ async def get_visual_content_stats(
             SUM(CASE WHEN yd.image_category = 'lifestyle' THEN 1 ELSE 0 END) as lifestyle_posts
         FROM analytics_marts.fct_messages fm
         JOIN analytics_marts.dim_channels dc ON fm.channel_key = dc.channel_key
-        LEFT JOIN image_analysis.yolo_detections yd ON fm.message_id = yd.message_id
+        LEFT JOIN image_analysis.yolo_detections yd
+            ON yd.channel_name = dc.channel_name AND yd.message_id = fm.message_id
         GROUP BY dc.channel_name, dc.channel_type
         ORDER BY image_percentage DESC
         """
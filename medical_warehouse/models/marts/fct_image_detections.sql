@@ -9,6 +9,7 @@ WITH image_detections AS (
     SELECT 
         y.message_id,
         y.channel_name,
+        c.channel_key,
         y.detected_objects,
         y.object_count,
         y.primary_object,
@@ -18,6 +19,7 @@ WITH image_detections AS (
         y.has_container,
         y.has_medical
     FROM image_analysis.yolo_detections y
+    LEFT JOIN {{ ref('dim_channels') }} c ON y.channel_name = c.channel_name
 ),
 
 joined_data AS (
@@ -43,7 +45,8 @@ joined_data AS (
             ELSE 'Other'
         END as image_category_description
     FROM {{ ref('fct_messages') }} f
-    LEFT JOIN image_detections i ON f.message_id = i.message_id
+    -- Message ids repeat across channels, so match on the channel too
+    LEFT JOIN image_detections i ON f.channel_key = i.channel_key AND f.message_id = i.message_id
     WHERE f.has_image = TRUE  -- Only messages with images
 )
 
@@ -19,7 +19,7 @@ WITH messages AS (
 )
 
 SELECT 
-    ROW_NUMBER() OVER (ORDER BY m.message_id) as message_key,
+    ROW_NUMBER() OVER (ORDER BY m.channel_name, m.message_id) as message_key,
     m.message_id,
     c.channel_key,
     d.date_key,
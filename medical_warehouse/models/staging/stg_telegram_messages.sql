@@ -12,6 +12,8 @@ SELECT
     message_text,
     has_media,
     image_path,
+    grouped_id,
+    COALESCE(CARDINALITY(image_paths), CASE WHEN image_path IS NOT NULL THEN 1 ELSE 0 END) as image_count,
     COALESCE(views, 0) as views,
     COALESCE(forwards, 0) as forwards
 FROM {{ source('raw', 'telegram_messages') }}
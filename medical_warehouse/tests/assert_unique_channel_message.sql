@@ -0,0 +1,8 @@
+-- Test that each message appears once per channel (the raw table's key)
+SELECT 
+    channel_name,
+    message_id,
+    COUNT(*) as row_count
+FROM {{ source('raw', 'telegram_messages') }}
+GROUP BY channel_name, message_id
+HAVING COUNT(*) > 1
@@ -0,0 +1,99 @@
+"""
+Benchmark raw message parsing: standard library json vs orjson
+Scales the bundled data/raw sample up (1000x by default) into a temporary
+directory as JSONL and as a pretty-printed JSON array, then times every
+reader path of src/utils/raw_io.py on it.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.raw_io import find_raw_files, iter_messages
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def load_sample(raw_root):
+    """All messages of the bundled raw sample"""
+    messages = []
+    for folder in sorted(d for d in Path(raw_root).iterdir() if d.is_dir()):
+        for raw_file in find_raw_files(folder):
+            messages.extend(iter_messages(raw_file))
+    return messages
+
+
+def write_scaled(messages, scale, out_dir):
+    """Write the sample repeated scale times (with distinct ids) as JSONL and as a JSON array"""
+    jsonl_path = out_dir / "scaled.jsonl"
+    array_path = out_dir / "scaled.json"
+
+    with open(jsonl_path, 'w', encoding='utf-8') as jsonl, open(array_path, 'w', encoding='utf-8') as array:
+        array.write('[\n')
+        first = True
+        for copy in range(scale):
+            for message in messages:
+                record = dict(message, message_id=copy * 1_000_000 + message['message_id'])
+                jsonl.write(json.dumps(record, ensure_ascii=False) + '\n')
+                if not first:
+                    array.write(',\n')
+                array.write(json.dumps(record, ensure_ascii=False, indent=2))
+                first = False
+        array.write('\n]\n')
+
+    return jsonl_path, array_path
+
+
+def timed(label, read, size_bytes):
+    """Run one reader to exhaustion and print its throughput"""
+    started = time.perf_counter()
+    count = sum(1 for _ in read())
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<38} {count:>9} msgs  {elapsed:7.2f}s  "
+          f"{count / elapsed:>10,.0f} msg/s  {size_bytes / elapsed / 1e6:7.1f} MB/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON parsing of raw Telegram messages")
+    parser.add_argument('--raw', default='data/raw/telegram_messages', help="Raw sample to scale up")
+    parser.add_argument('--scale', type=int, default=1000, help="Copies of the sample")
+    args = parser.parse_args()
+
+    messages = load_sample(args.raw)
+    print(f"Sample: {len(messages)} messages x {args.scale}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path, array_path = write_scaled(messages, args.scale, Path(tmp))
+        jsonl_size = jsonl_path.stat().st_size
+        array_size = array_path.stat().st_size
+        print(f"JSONL: {jsonl_size / 1e6:.1f} MB, JSON array: {array_size / 1e6:.1f} MB\n")
+
+        print("JSONL")
+        timed("stdlib json.loads per line", lambda: iter_messages(jsonl_path, loads=json.loads), jsonl_size)
+        if orjson is not None:
+            timed("orjson.loads per line", lambda: iter_messages(jsonl_path, loads=orjson.loads), jsonl_size)
+
+        print("\nJSON array")
+        timed("stdlib json.loads (whole file)",
+              lambda: iter_messages(array_path, loads=json.loads, iterative=False), array_size)
+        if orjson is not None:
+            timed("orjson.loads (whole file)",
+                  lambda: iter_messages(array_path, loads=orjson.loads, iterative=False), array_size)
+        timed("iterative raw_decode (bounded memory)",
+              lambda: iter_messages(array_path, iterative=True), array_size)
+
+    if orjson is None:
+        print("\norjson is not installed: only the standard library paths were measured")
+
+
+if __name__ == "__main__":
+    main()
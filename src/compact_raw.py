@@ -0,0 +1,52 @@
+"""
+Compact the raw message lake into deduplicated per-channel segments
+Keeps data/raw/compacted/telegram_messages/manifest.json up to date
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Make the project root importable when run as `python src/compact_raw.py`
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.compaction import COMPACTED_ROOT, RAW_ROOT, LakeManifest, compact_lake
+
+
+def parse_args():
+    """Command line options for the compaction job"""
+    parser = argparse.ArgumentParser(description="Compact raw Telegram snapshots into per-channel segments")
+    parser.add_argument('--raw', default=RAW_ROOT,
+                        help="Root of the raw date folders")
+    parser.add_argument('--output', default=COMPACTED_ROOT,
+                        help="Root of the compacted segments and manifest")
+    parser.add_argument('--segment-size', type=int, default=10000,
+                        help="Messages per segment file")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-read every raw file, not only new or changed ones")
+    return parser.parse_args()
+
+
+def main():
+    """Entry point"""
+    args = parse_args()
+
+    if not Path(args.raw).exists():
+        print(" No data directory found!")
+        return
+
+    compacted = compact_lake(args.raw, args.output, segment_size=args.segment_size, force=args.force)
+    if not compacted:
+        print(" Nothing to compact: no new or changed raw files")
+
+    manifest = LakeManifest(args.output)
+    for channel_name, count in compacted.items():
+        segments = manifest.select(channel_name=channel_name)
+        print(f"    {channel_name}: {count} messages in {len(segments)} segments")
+
+    print(f"\n Manifest: {manifest.path} ({len(manifest.segments)} segments, "
+          f"{sum(s['rows'] for s in manifest.segments)} messages)")
+
+
+if __name__ == "__main__":
+    main()
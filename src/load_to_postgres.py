@@ -3,32 +3,75 @@ Load scraped Telegram data into PostgreSQL
 Step 1: Load raw data to database
 """
 
+import argparse
+import io
 import os
-import json
+import sys
 import psycopg2
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from psycopg2 import errors
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
-import pandas as pd
+
+# Make the project root importable when run as `python src/load_to_postgres.py`
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.models.message import TelegramMessage
+from src.utils.compaction import RAW_ROOT, file_checksum
+from src.utils.pg_copy import STAGING_COLUMNS, copy_chunks, render_file
+from src.utils.raw_io import find_raw_files, iter_records
 
 # Load environment variables
 load_dotenv()
 
+LOAD_MODES = ('upsert', 'insert')
+
+# Payload columns: a change in any of them makes a reload update the row
+PAYLOAD_COLUMNS = (
+    'channel_name', 'message_date', 'message_text', 'has_media', 'image_path',
+    'views', 'forwards', 'grouped_id', 'image_paths'
+)
+
+# Retries of a file whose merge deadlocked with another writer
+DEADLOCK_RETRIES = 3
+
+# Hash partitions of raw.telegram_messages (by channel_name)
+MESSAGE_PARTITIONS = int(os.getenv('RAW_MESSAGE_PARTITIONS', '8'))
+
+
+def connection_params(database='medical_warehouse'):
+    """psycopg2.connect keyword arguments from the DB_* environment"""
+    return dict(
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=os.getenv('DB_PORT', '5432'),
+        database=database,
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD', '031628')
+    )
+
 class DataLoader:
-    def __init__(self):
-        """Initialize database connection - FIXED to handle missing database"""
+    def __init__(self, mode=None, workers=None):
+        """Initialize database connection - FIXED to handle missing database
+        
+        Args:
+            mode: 'upsert' (default, LOAD_MODE) updates rows whose payload changed;
+                  'insert' only adds new rows
+            workers: Files parsed and written in parallel (default LOAD_WORKERS or 1)
+        """
         print(" Initializing PostgreSQL connection...")
         
+        self.mode = mode or os.getenv('LOAD_MODE', 'upsert')
+        if self.mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode: {self.mode!r} (expected one of {LOAD_MODES})")
+        self.workers = max(1, workers or int(os.getenv('LOAD_WORKERS', '1')))
+        
         # FIRST connect to default 'postgres' database to check/create our database
         try:
             # Connect to default 'postgres' database
-            temp_conn = psycopg2.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                port=os.getenv('DB_PORT', '5432'),
-                database='postgres',  # Connect to default database
-                user=os.getenv('DB_USER', 'postgres'),
-                password=os.getenv('DB_PASSWORD', '031628')
-            )
+            temp_conn = psycopg2.connect(**connection_params('postgres'))
             temp_conn.autocommit = True  # Need this for CREATE DATABASE
             temp_cursor = temp_conn.cursor()
             
@@ -51,13 +94,7 @@ class DataLoader:
         
         # NOW connect to our medical_warehouse database
         print(" Connecting to medical_warehouse database...")
-        self.connection = psycopg2.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            port=os.getenv('DB_PORT', '5432'),
-            database='medical_warehouse',  # Now this exists!
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD', '031628')
-        )
+        self.connection = psycopg2.connect(**connection_params())
         self.cursor = self.connection.cursor()
         
         print(" Connected to PostgreSQL database: medical_warehouse")
@@ -69,10 +106,16 @@ class DataLoader:
         # Create raw schema
         self.cursor.execute("CREATE SCHEMA IF NOT EXISTS raw;")
         
-        # Create telegram_messages table
+        # Tables from before the composite key are moved aside and copied over below
+        legacy = self.table_kind('raw', 'telegram_messages') == 'r'
+        if legacy:
+            self.rename_legacy_messages()
+        
+        # Telegram message ids are only unique within a channel: key on both and
+        # hash-partition by channel, so a channel's rows live in one partition
         create_table_sql = """
         CREATE TABLE IF NOT EXISTS raw.telegram_messages (
-            message_id BIGINT PRIMARY KEY,
+            message_id BIGINT NOT NULL,
             channel_name TEXT NOT NULL,
             message_date TIMESTAMP,
             message_text TEXT,
@@ -80,98 +123,553 @@ class DataLoader:
             image_path TEXT,
             views INTEGER DEFAULT 0,
             forwards INTEGER DEFAULT 0,
-            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+            scraped_at TIMESTAMP DEFAULT timezone('UTC', CURRENT_TIMESTAMP),
+            PRIMARY KEY (channel_name, message_id)
+        ) PARTITION BY HASH (channel_name);
         """
         
+        # The partition count is fixed when the table is created
+        created = self.table_kind('raw', 'telegram_messages') is None
         self.cursor.execute(create_table_sql)
+        for remainder in range(MESSAGE_PARTITIONS if created else 0):
+            self.cursor.execute(f"""
+            CREATE TABLE raw.telegram_messages_p{remainder}
+            PARTITION OF raw.telegram_messages
+            FOR VALUES WITH (MODULUS {MESSAGE_PARTITIONS}, REMAINDER {remainder});
+            """)
+        
+        # Date filters (recent messages, retention deletes) use an index in every partition
+        self.cursor.execute("""
+        CREATE INDEX IF NOT EXISTS telegram_messages_message_date_idx
+        ON raw.telegram_messages (message_date);
+        """)
+        
+        # When views/forwards were last refreshed (see update_message_metrics). Like
+        # scraped_at it is UTC in whole seconds, whatever the session or scraper
+        # host time zone, so the upsert guard compares the two on one clock
+        self.cursor.execute("""
+        ALTER TABLE raw.telegram_messages
+        ADD COLUMN IF NOT EXISTS metrics_updated_at TIMESTAMP,
+        ALTER COLUMN scraped_at SET DEFAULT timezone('UTC', CURRENT_TIMESTAMP);
+        """)
+        
+        # Albums: one row per post, with every image of the post
+        self.cursor.execute("""
+        ALTER TABLE raw.telegram_messages
+        ADD COLUMN IF NOT EXISTS grouped_id BIGINT,
+        ADD COLUMN IF NOT EXISTS image_paths TEXT[];
+        """)
+        
+        # Change detection for upserts: hash of the payload, and when the row last changed
+        self.cursor.execute("""
+        ALTER TABLE raw.telegram_messages
+        ADD COLUMN IF NOT EXISTS row_hash TEXT,
+        ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+        """)
+        self.cursor.execute("""
+        CREATE OR REPLACE FUNCTION raw.message_row_hash(
+            channel_name TEXT, message_date TIMESTAMP, message_text TEXT, has_media BOOLEAN,
+            image_path TEXT, views INTEGER, forwards INTEGER, grouped_id BIGINT, image_paths TEXT[]
+        ) RETURNS TEXT LANGUAGE sql STABLE AS $$
+            SELECT md5(ROW($1, $2, $3, $4, $5, $6, $7, $8, $9)::text)
+        $$;
+        """)
+        
+        if legacy:
+            self.migrate_legacy_messages()
+        
+        # Engagement history: one row per message per metrics refresh
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS raw.telegram_message_metrics (
+            channel_name TEXT NOT NULL,
+            message_id BIGINT NOT NULL,
+            views INTEGER,
+            forwards INTEGER,
+            captured_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (channel_name, message_id, captured_at)
+        );
+        """)
+        
+        # Load ledger: one row per raw file, so each run only loads new or changed files
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS raw.load_ledger (
+            file_path TEXT PRIMARY KEY,
+            size_bytes BIGINT NOT NULL,
+            mtime DOUBLE PRECISION NOT NULL,
+            checksum TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
         self.connection.commit()
         
         print(" Created raw.telegram_messages table")
     
-    def find_latest_data(self):
-        """Find the latest scraped data folder"""
-        data_dir = Path("data/raw/telegram_messages")
+    def table_kind(self, schema, table):
+        """pg_class.relkind of a table ('r' plain, 'p' partitioned), or None if it does not exist"""
+        self.cursor.execute("""
+        SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %s AND c.relname = %s;
+        """, (schema, table))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+    
+    def rename_legacy_messages(self):
+        """Move a message_id-keyed raw.telegram_messages aside as telegram_messages_legacy"""
+        print(" Migrating raw.telegram_messages to the (channel_name, message_id) key...")
+        
+        # The detections FK points at the old key; load_yolo_results.py recreates it on both columns
+        self.cursor.execute("""
+        ALTER TABLE IF EXISTS image_analysis.yolo_detections
+        DROP CONSTRAINT IF EXISTS yolo_detections_message_id_fkey;
+        """)
+        self.cursor.execute("ALTER TABLE raw.telegram_messages RENAME TO telegram_messages_legacy;")
+        self.cursor.execute("ALTER INDEX IF EXISTS raw.telegram_messages_pkey RENAME TO telegram_messages_legacy_pkey;")
+    
+    def migrate_legacy_messages(self):
+        """
+        Copy telegram_messages_legacy into the partitioned table and drop it
+        
+        Views built on the old table (dbt's stg_telegram_messages) followed the
+        rename, so they are dropped with it; `dbt run` recreates them.
+        """
+        self.cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'raw' AND table_name = 'telegram_messages_legacy'
+        INTERSECT
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'raw' AND table_name = 'telegram_messages';
+        """)
+        columns = ', '.join(sorted(row[0] for row in self.cursor.fetchall()))
+        
+        self.cursor.execute(f"""
+        INSERT INTO raw.telegram_messages ({columns})
+        SELECT {columns} FROM raw.telegram_messages_legacy
+        ON CONFLICT (channel_name, message_id) DO NOTHING;
+        """)
+        migrated = self.cursor.rowcount
+        
+        # Rows from before row hashes existed
+        self.cursor.execute("""
+        UPDATE raw.telegram_messages
+        SET row_hash = raw.message_row_hash(channel_name, message_date, message_text, has_media,
+                                            image_path, views, forwards, grouped_id, image_paths)
+        WHERE row_hash IS NULL;
+        """)
+        self.cursor.execute("""
+        SELECT DISTINCT v.oid::regclass::text
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.refobjid = 'raw.telegram_messages_legacy'::regclass AND v.oid <> d.refobjid;
+        """)
+        views = [row[0] for row in self.cursor.fetchall()]
+        
+        self.cursor.execute("DROP TABLE raw.telegram_messages_legacy CASCADE;")
+        print(f" Migrated {migrated} messages into {MESSAGE_PARTITIONS} partitions")
+        if views:
+            print(f" Dropped views on the old table: {', '.join(views)} - run `dbt run` to recreate them")
+    
+    def find_data_folders(self):
+        """All scraped date folders, oldest first"""
+        data_dir = Path(RAW_ROOT)
         
         if not data_dir.exists():
             print(" No data directory found!")
-            return None
+            return []
         
-        # Get all date folders
-        date_folders = [d for d in data_dir.iterdir() if d.is_dir()]
+        date_folders = sorted(d for d in data_dir.iterdir() if d.is_dir())
         
         if not date_folders:
             print(" No data folders found!")
+        
+        return date_folders
+    
+    def find_latest_data(self):
+        """Find the latest scraped data folder"""
+        date_folders = self.find_data_folders()
+        if not date_folders:
             return None
         
         # Use the latest folder
-        latest_folder = sorted(date_folders)[-1]
+        latest_folder = date_folders[-1]
         print(f" Using data from: {latest_folder.name}")
         
         return latest_folder
     
-    def load_json_files(self, data_folder):
-        """Load all JSON files from the data folder"""
-        json_files = list(data_folder.glob("*.json"))
+    def find_pending_files(self, data_folders, force=False):
+        """
+        Raw files not yet in the load ledger, or changed since they were loaded
+        
+        Size and mtime are compared first; the checksum is only computed when
+        they differ, so a file that was merely touched is not reloaded.
+        
+        Args:
+            data_folders: Date folders to scan
+            force: Return every file, loaded or not
+        
+        Returns:
+            List of (raw_file, size_bytes, mtime, checksum) tuples
+        """
+        self.cursor.execute("SELECT file_path, size_bytes, mtime, checksum FROM raw.load_ledger;")
+        ledger = {row[0]: row[1:] for row in self.cursor.fetchall()}
+        
+        pending = []
+        for data_folder in data_folders:
+            for raw_file in find_raw_files(data_folder):
+                stat = raw_file.stat()
+                known = ledger.get(str(raw_file))
+                if not force and known and known[:2] == (stat.st_size, stat.st_mtime):
+                    continue
+                
+                checksum = file_checksum(raw_file)
+                if not force and known and known[2] == checksum:
+                    # Same content, new mtime: remember it so the checksum is not recomputed
+                    self.cursor.execute("""
+                    UPDATE raw.load_ledger SET size_bytes = %s, mtime = %s WHERE file_path = %s;
+                    """, (stat.st_size, stat.st_mtime, str(raw_file)))
+                    continue
+                
+                pending.append((raw_file, stat.st_size, stat.st_mtime, checksum))
+        
+        self.connection.commit()
+        return pending
+    
+    def record_load(self, raw_file, size_bytes, mtime, checksum, rows, cursor=None):
+        """Add or refresh the ledger row of a loaded file (in the caller's transaction)"""
+        (cursor or self.cursor).execute("""
+        INSERT INTO raw.load_ledger (file_path, size_bytes, mtime, checksum, rows, loaded_at)
+        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (file_path) DO UPDATE SET
+            size_bytes = EXCLUDED.size_bytes, mtime = EXCLUDED.mtime, checksum = EXCLUDED.checksum,
+            rows = EXCLUDED.rows, loaded_at = EXCLUDED.loaded_at;
+        """, (str(raw_file), size_bytes, mtime, checksum, rows))
+    
+    def load_json_files(self, data_folder, force=False):
+        """Load the new or changed raw files (.jsonl and legacy .json) of one data folder"""
+        return self.load_files(self.find_pending_files([data_folder], force=force))
+    
+    def load_files(self, pending):
+        """
+        Load raw files and record each one in the load ledger
+        
+        Every file is committed together with its ledger row, so a failed or
+        interrupted run is simply resumed by the next one.
         
-        if not json_files:
-            print(" No JSON files found!")
+        Args:
+            pending: (raw_file, size_bytes, mtime, checksum) tuples from find_pending_files
+        
+        Returns:
+            Number of messages read from the files
+        """
+        self.load_stats = {'files': 0, 'failed': 0, 'rows': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0}
+        
+        if not pending:
+            print(" No new or changed raw files to load")
             return 0
         
+        if self.workers > 1 and len(pending) > 1:
+            return self.load_files_parallel(pending)
+        
         total_messages = 0
         
-        for json_file in json_files:
-            print(f"\n Loading: {json_file.name}")
+        for raw_file, size_bytes, mtime, checksum in pending:
+            print(f"\n Loading: {raw_file.parent.name}/{raw_file.name}")
             
             try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    messages = json.load(f)
-                
-                # Insert each message
-                for msg in messages:
-                    self.insert_message(msg)
-                
-                total_messages += len(messages)
-                print(f"    Loaded {len(messages)} messages")
+                # Read lazily so large JSONL files are never fully in memory
+                result = self.bulk_load(iter_records(raw_file))
+                self.record_load(raw_file, size_bytes, mtime, checksum, result['rows'])
+                self.connection.commit()
                 
             except Exception as e:
-                print(f"    Error loading {json_file}: {e}")
+                # A failed file is rolled back alone and retried on the next run
+                self.connection.rollback()
+                self.load_stats['failed'] += 1
+                print(f"    Error loading {raw_file}: {e}")
                 continue
+            
+            total_messages += result['rows']
+            self.count_loaded(result)
         
         return total_messages
     
-    def insert_message(self, message_data):
-        """Insert a single message into the database"""
-        insert_sql = """
-        INSERT INTO raw.telegram_messages 
-        (message_id, channel_name, message_date, message_text, 
-         has_media, image_path, views, forwards)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (message_id) DO NOTHING;
+    def count_loaded(self, result):
+        """Add one file's merge result to load_stats and report it"""
+        self.load_stats['files'] += 1
+        for key in ('rows', 'inserted', 'updated', 'unchanged'):
+            self.load_stats[key] += result[key]
+        print(f"    Loaded {result['rows']} messages ({result['inserted']} new, "
+              f"{result['updated']} changed, {result['unchanged']} unchanged)")
+    
+    def load_files_parallel(self, pending, chunk_rows=50000):
+        """
+        Load raw files with self.workers parsers and self.workers writers
+        
+        Each of self.workers threads takes the next file, has it parsed into
+        COPY payloads by the process pool, then writes it through its own
+        pooled connection: staging COPY, merge and ledger row in one
+        transaction. At most self.workers parsed files are held in memory.
+        
+        Returns:
+            Number of messages read from the files
         """
+        print(f" Loading {len(pending)} files with {self.workers} workers")
         
+        connections = ThreadedConnectionPool(1, self.workers, **connection_params())
+        
+        def load(parsers, raw_file, size_bytes, mtime, checksum):
+            chunks = parsers.submit(render_file, str(raw_file), chunk_rows).result()
+            
+            connection = connections.getconn()
+            try:
+                for attempt in range(DEADLOCK_RETRIES + 1):
+                    try:
+                        with connection.cursor() as cursor:
+                            result = self.merge_chunks(((io.StringIO(text), rows) for text, rows in chunks), cursor)
+                            self.record_load(raw_file, size_bytes, mtime, checksum, result['rows'], cursor)
+                        connection.commit()
+                        return result
+                    except errors.DeadlockDetected:
+                        # Another writer merged overlapping messages; retry the whole file
+                        connection.rollback()
+                        if attempt == DEADLOCK_RETRIES:
+                            raise
+                    except Exception:
+                        connection.rollback()
+                        raise
+            finally:
+                connections.putconn(connection)
+        
+        total_messages = 0
         try:
-            # Prepare data
-            message_date = message_data.get('message_date')
-            if message_date:
-                try:
-                    message_date = pd.to_datetime(message_date)
-                except:
-                    message_date = None
+            with ProcessPoolExecutor(max_workers=self.workers) as parsers, \
+                 ThreadPoolExecutor(max_workers=self.workers) as writers:
+                futures = {writers.submit(load, parsers, *entry): entry[0] for entry in pending}
+                
+                for future in as_completed(futures):
+                    raw_file = futures[future]
+                    print(f"\n Loading: {raw_file.parent.name}/{raw_file.name}")
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.load_stats['failed'] += 1
+                        print(f"    Error loading {raw_file}: {e}")
+                        continue
+                    
+                    total_messages += result['rows']
+                    self.count_loaded(result)
+        finally:
+            connections.closeall()
+        
+        return total_messages
+    
+    def create_staging_table(self, cursor=None):
+        """Session-local staging table the COPY payload lands in (emptied on commit)"""
+        cursor = cursor or self.cursor
+        cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS staging_telegram_messages (
+            message_id BIGINT,
+            channel_name TEXT,
+            message_date TIMESTAMP,
+            message_text TEXT,
+            has_media BOOLEAN,
+            image_path TEXT,
+            views INTEGER,
+            forwards INTEGER,
+            grouped_id BIGINT,
+            image_paths TEXT[],
+            scraped_at TIMESTAMP
+        ) ON COMMIT DELETE ROWS;
+        """)
+        cursor.execute("TRUNCATE staging_telegram_messages;")
+    
+    def bulk_load(self, messages, chunk_rows=50000):
+        """
+        Load messages with COPY into a staging table and one set-based merge
+        
+        Messages are rendered into in-memory COPY buffers of chunk_rows rows,
+        so memory stays bounded; duplicates within the batch keep their most
+        recently scraped version. Does not commit.
+        
+        In upsert mode an existing row is only rewritten when its payload hash
+        differs and the incoming version was scraped no earlier than the row's
+        last scrape or metrics refresh, so reloading an unchanged snapshot
+        writes nothing and old records never undo refreshed views/forwards.
+        
+        Args:
+            messages: Iterable of TelegramMessage records or raw dicts
+            chunk_rows: Rows per COPY buffer
+        
+        Returns:
+            Dict with rows (copied), inserted, updated and unchanged (identical or
+            older than the stored row) counts
+        """
+        return self.merge_chunks(copy_chunks(messages, chunk_rows=chunk_rows))
+    
+    def merge_chunks(self, chunks, cursor=None):
+        """
+        COPY rendered chunks into the staging table and merge them (see bulk_load)
+        
+        Args:
+            chunks: (buffer, rows) pairs from copy_chunks
+            cursor: Cursor of the connection to write through (default: the loader's own)
+        """
+        cursor = cursor or self.cursor
+        self.create_staging_table(cursor)
+        
+        rows = 0
+        copy_sql = f"COPY staging_telegram_messages ({', '.join(STAGING_COLUMNS)}) FROM STDIN;"
+        for buffer, count in chunks:
+            cursor.copy_expert(copy_sql, buffer)
+            rows += count
+        
+        if not rows:
+            return {'rows': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0}
+        
+        payload = ', '.join(PAYLOAD_COLUMNS)
+        if self.mode == 'upsert':
+            updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in PAYLOAD_COLUMNS)
+            conflict = f"""DO UPDATE SET {updates}, scraped_at = EXCLUDED.scraped_at,
+                row_hash = EXCLUDED.row_hash, updated_at = EXCLUDED.updated_at
+            WHERE raw.telegram_messages.row_hash IS DISTINCT FROM EXCLUDED.row_hash
+              AND EXCLUDED.scraped_at >= GREATEST(raw.telegram_messages.scraped_at,
+                                                  raw.telegram_messages.metrics_updated_at)"""
+        else:
+            conflict = "DO NOTHING"
+        
+        # Keys already present before this merge tell inserts from updates (xmax
+        # cannot be read from a partitioned table); rows are written in key order
+        # so concurrent writers lock them in the same order
+        staged = ', '.join(f"s.{c}" for c in PAYLOAD_COLUMNS)
+        cursor.execute(f"""
+        WITH source AS (
+            SELECT DISTINCT ON (s.channel_name, s.message_id)
+                s.message_id, {staged},
+                COALESCE(s.scraped_at, timezone('UTC', CURRENT_TIMESTAMP)) AS scraped_at,
+                raw.message_row_hash({staged}) AS row_hash,
+                EXISTS (
+                    SELECT 1 FROM raw.telegram_messages t
+                    WHERE t.channel_name = s.channel_name AND t.message_id = s.message_id
+                ) AS existed
+            FROM staging_telegram_messages s
+            ORDER BY s.channel_name, s.message_id, s.scraped_at DESC NULLS LAST
+        ), merged AS (
+            INSERT INTO raw.telegram_messages
+            (message_id, {payload}, scraped_at, row_hash, updated_at)
+            SELECT message_id, {payload}, scraped_at, row_hash, CURRENT_TIMESTAMP
+            FROM source
+            ORDER BY channel_name, message_id
+            ON CONFLICT (channel_name, message_id) {conflict}
+            RETURNING channel_name, message_id
+        )
+        SELECT
+            (SELECT COUNT(*) FROM source),
+            COUNT(*) FILTER (WHERE NOT source.existed),
+            COUNT(*) FILTER (WHERE source.existed)
+        FROM merged JOIN source USING (channel_name, message_id);
+        """)
+        distinct_rows, inserted, updated = cursor.fetchone()
+        
+        cursor.execute("TRUNCATE staging_telegram_messages;")
+        return {'rows': rows, 'inserted': inserted, 'updated': updated,
+                'unchanged': distinct_rows - inserted - updated}
+    
+    def load_messages(self, messages):
+        """Bulk-load a batch of messages (TelegramMessage or dicts) and commit (used by the scraper's live mode)"""
+        try:
+            result = self.bulk_load(messages)
+            self.connection.commit()
+            return result['rows']
+        except Exception:
+            self.connection.rollback()
+            raise
+    
+    def recent_message_ids(self, max_age_days=7, channels=None):
+        """
+        Message ids posted within the last max_age_days, grouped by channel
+        
+        Returns:
+            Dict mapping channel name to a list of message ids
+        """
+        sql = """
+        SELECT channel_name, message_id
+        FROM raw.telegram_messages
+        WHERE message_date >= NOW() - make_interval(days => %s)
+        """
+        params = [max_age_days]
+        if channels:
+            sql += " AND channel_name = ANY(%s)"
+            params.append(list(channels))
+        
+        self.cursor.execute(sql + " ORDER BY channel_name, message_id;", params)
+        
+        recent = {}
+        for channel_name, message_id in self.cursor.fetchall():
+            recent.setdefault(channel_name, []).append(message_id)
+        return recent
+    
+    def update_message_metrics(self, metrics, page_size=1000):
+        """
+        Bulk-update views and forwards and append them to the engagement history
+        
+        Args:
+            metrics: Iterable of dicts with channel_name, message_id, views, forwards
+            page_size: Rows per statement sent by execute_values
+        
+        Returns:
+            Number of raw.telegram_messages rows updated
+        """
+        rows = [(m['channel_name'], m['message_id'], m.get('views', 0), m.get('forwards', 0))
+                for m in metrics]
+        if not rows:
+            return 0
+        
+        try:
+            # One UPDATE ... FROM (VALUES ...) per page instead of one round-trip per row
+            updated = 0
+            for start in range(0, len(rows), page_size):
+                execute_values(self.cursor, """
+                UPDATE raw.telegram_messages AS t
+                SET views = v.views, forwards = v.forwards, metrics_updated_at = date_trunc('second', timezone('UTC', CURRENT_TIMESTAMP)),
+                    updated_at = CASE WHEN (t.views, t.forwards) IS DISTINCT FROM (v.views, v.forwards)
+                                      THEN CURRENT_TIMESTAMP ELSE t.updated_at END,
+                    row_hash = raw.message_row_hash(t.channel_name, t.message_date, t.message_text, t.has_media,
+                                                    t.image_path, v.views, v.forwards, t.grouped_id, t.image_paths)
+                FROM (VALUES %s) AS v(channel_name, message_id, views, forwards)
+                WHERE t.channel_name = v.channel_name AND t.message_id = v.message_id;
+                """, rows[start:start + page_size], page_size=page_size)
+                updated += self.cursor.rowcount
             
-            self.cursor.execute(insert_sql, (
-                message_data.get('message_id'),
-                message_data.get('channel_name'),
-                message_date,
-                message_data.get('message_text', ''),
-                message_data.get('has_media', False),
-                message_data.get('image_path'),
-                message_data.get('views', 0),
-                message_data.get('forwards', 0)
-            ))
+            execute_values(self.cursor, """
+            INSERT INTO raw.telegram_message_metrics (channel_name, message_id, views, forwards)
+            VALUES %s
+            ON CONFLICT DO NOTHING;
+            """, rows, page_size=page_size)
+            
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        
+        return updated
+    
+    def insert_message(self, message):
+        """Insert (or, in upsert mode, update) a single message (TelegramMessage or raw dict)
+        
+        Goes through the same merge as bulk_load so row_hash stays consistent.
+        """
+        if isinstance(message, dict):
+            message = TelegramMessage.from_dict(message)
+        
+        try:
+            self.cursor.execute("SAVEPOINT insert_message;")
+            self.bulk_load([message])
+            self.cursor.execute("RELEASE SAVEPOINT insert_message;")
             
         except Exception as e:
-            print(f"    Error inserting message {message_data.get('message_id')}: {e}")
+            self.cursor.execute("ROLLBACK TO SAVEPOINT insert_message;")
+            print(f"    Error inserting message {message.message_id}: {e}")
     
     def verify_data(self):
         """Verify data was loaded correctly"""
@@ -196,27 +694,33 @@ class DataLoader:
         
         return total_count
     
-    def run(self):
-        """Main execution function"""
+    def run(self, force=False):
+        """Main execution function
+        
+        Args:
+            force: Reload every raw file, ignoring the load ledger
+        """
         try:
             # Step 1: Create schema
             self.create_raw_schema()
             
-            # Step 2: Find latest data
-            data_folder = self.find_latest_data()
-            if not data_folder:
+            # Step 2: Find raw files not loaded yet (or changed) across all dates
+            data_folders = self.find_data_folders()
+            if not data_folders:
                 return
+            pending = self.find_pending_files(data_folders, force=force)
+            print(f" {len(pending)} new or changed raw files in {len(data_folders)} date folders")
             
-            # Step 3: Load data
-            total_loaded = self.load_json_files(data_folder)
-            
-            # Commit changes
-            self.connection.commit()
+            # Step 3: Load data (committed file by file)
+            total_loaded = self.load_files(pending)
             
             # Step 4: Verify
             total_in_db = self.verify_data()
             
             print(f"\n Successfully loaded {total_loaded} messages into PostgreSQL!")
+            print(f" Files loaded: {self.load_stats['files']}, failed: {self.load_stats['failed']}")
+            print(f" Mode {self.mode}: {self.load_stats['inserted']} new, {self.load_stats['updated']} changed, "
+                  f"{self.load_stats['unchanged']} unchanged")
             print(f" Database now contains: {total_in_db} total messages")
             print("\n Database is ready for dbt transformations!")
             
@@ -228,8 +732,22 @@ class DataLoader:
             self.cursor.close()
             self.connection.close()
 
+def parse_args():
+    """Command line options"""
+    parser = argparse.ArgumentParser(description="Load raw Telegram messages into PostgreSQL")
+    parser.add_argument('--mode', choices=LOAD_MODES, default=None,
+                        help="upsert updates changed rows, insert only adds new ones (default: LOAD_MODE or upsert)")
+    parser.add_argument('--force', action='store_true',
+                        help="Reload every raw file, not only those missing from the load ledger or changed")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Files parsed and written in parallel (default: LOAD_WORKERS or 1)")
+    return parser.parse_args()
+
+
 def main():
     """Entry point"""
+    args = parse_args()
+    
     print("="*60)
     print(" POSTGRESQL DATA LOADER ")
     print("Loading Telegram data into PostgreSQL for dbt transformations")
@@ -242,8 +760,8 @@ def main():
     print("3. Port 5432 is open")
     print("="*60)
     
-    loader = DataLoader()
-    loader.run()
+    loader = DataLoader(mode=args.mode, workers=args.workers)
+    loader.run(force=args.force)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -58,11 +58,30 @@ class YOLOLoader:
             has_container BOOLEAN DEFAULT FALSE,
             has_medical BOOLEAN DEFAULT FALSE,
             detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (message_id) REFERENCES raw.telegram_messages(message_id)
+            FOREIGN KEY (channel_name, message_id) REFERENCES raw.telegram_messages(channel_name, message_id)
         );
         """
         
         self.cursor.execute(create_table_sql)
+        
+        # Tables created before the composite message key referenced message_id alone
+        self.cursor.execute("""
+        ALTER TABLE image_analysis.yolo_detections
+        DROP CONSTRAINT IF EXISTS yolo_detections_message_id_fkey;
+        """)
+        self.cursor.execute("""
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'image_analysis.yolo_detections'::regclass AND contype = 'f';
+        """)
+        if not self.cursor.fetchone():
+            # NOT VALID: older rows (e.g. album members stored under their own id) are
+            # not rechecked, new rows are
+            self.cursor.execute("""
+            ALTER TABLE image_analysis.yolo_detections
+            ADD CONSTRAINT yolo_detections_channel_name_message_id_fkey
+            FOREIGN KEY (channel_name, message_id) REFERENCES raw.telegram_messages(channel_name, message_id)
+            NOT VALID;
+            """)
         self.connection.commit()
         
         logger.info(" Created image_analysis.yolo_detections table")
@@ -93,6 +112,8 @@ class YOLOLoader:
         
         rows_loaded = 0
         for _, row in df.iterrows():
+            # A rejected row (e.g. no matching message) must not abort the whole load
+            self.cursor.execute("SAVEPOINT yolo_row;")
             try:
                 self.cursor.execute(insert_sql, (
                     row['image_path'],
@@ -107,8 +128,10 @@ class YOLOLoader:
                     bool(row['has_container']),
                     bool(row['has_medical'])
                 ))
+                self.cursor.execute("RELEASE SAVEPOINT yolo_row;")
                 rows_loaded += 1
             except Exception as e:
+                self.cursor.execute("ROLLBACK TO SAVEPOINT yolo_row;")
                 logger.warning(f" Error inserting row {row['message_id']}: {e}")
                 continue
         
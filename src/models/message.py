@@ -0,0 +1,113 @@
+"""
+Typed in-memory record of one Telegram message (or album post)
+Passed between the scraper, the raw lake tools and the loaders instead of
+plain dicts: __slots__ keeps instances small, channel names are interned and
+timestamps are integer epoch seconds. to_dict() / from_dict() convert to and
+from the raw JSON record shape.
+"""
+import sys
+from datetime import datetime, timezone
+
+FIELDS = (
+    'message_id', 'channel_name', 'message_date', 'message_text', 'has_media',
+    'views', 'forwards', 'image_path', 'image_paths', 'grouped_id',
+    'album_message_ids', 'scraped_at'
+)
+
+# Raw record keys written only when set
+_OPTIONAL = ('image_path', 'image_paths', 'album_message_ids')
+
+
+def to_epoch(value):
+    """Epoch seconds from an ISO string, datetime or number (None stays None)"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    # Naive datetimes (scraped_at of older raw files) are local time
+    return int(value.timestamp())
+
+
+class TelegramMessage:
+    __slots__ = FIELDS
+
+    def __init__(self, message_id, channel_name, message_date=None, message_text='', has_media=False,
+                 views=0, forwards=0, image_path=None, image_paths=None, grouped_id=None,
+                 album_message_ids=None, scraped_at=None):
+        self.message_id = message_id
+        self.channel_name = sys.intern(channel_name) if channel_name else channel_name
+        self.message_date = to_epoch(message_date)
+        self.message_text = message_text or ''
+        self.has_media = bool(has_media)
+        self.views = views or 0
+        self.forwards = forwards or 0
+        self.image_path = image_path
+        self.image_paths = image_paths
+        self.grouped_id = grouped_id
+        self.album_message_ids = album_message_ids
+        self.scraped_at = to_epoch(scraped_at)
+
+    @classmethod
+    def from_telegram(cls, message, channel_name):
+        """Build a record from a Telethon message"""
+        return cls(
+            message_id=message.id,
+            channel_name=channel_name,
+            message_date=message.date,
+            message_text=message.text,
+            has_media=message.media is not None,
+            views=message.views,
+            forwards=message.forwards,
+            grouped_id=message.grouped_id,
+            scraped_at=datetime.now(timezone.utc)
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from a raw JSON dict (unknown keys are ignored)"""
+        return cls(**{field: data[field] for field in FIELDS if field in data})
+
+    def to_dict(self):
+        """Raw JSON record: ISO timestamps (UTC offsets included), optional keys only when set"""
+        record = {
+            'message_id': self.message_id,
+            'channel_name': self.channel_name,
+            'message_date': self.message_datetime.isoformat() if self.message_date is not None else None,
+            'message_text': self.message_text,
+            'has_media': self.has_media,
+            'views': self.views,
+            'forwards': self.forwards,
+            'grouped_id': self.grouped_id,
+            'scraped_at': (datetime.fromtimestamp(self.scraped_at, tz=timezone.utc).isoformat()
+                           if self.scraped_at is not None else None)
+        }
+        for field in _OPTIONAL:
+            value = getattr(self, field)
+            if value is not None:
+                record[field] = value
+        return record
+
+    @property
+    def message_datetime(self):
+        """message_date as an aware UTC datetime"""
+        if self.message_date is None:
+            return None
+        return datetime.fromtimestamp(self.message_date, tz=timezone.utc)
+
+    @property
+    def message_ids(self):
+        """Telegram ids covered by this record (every member of an album)"""
+        return self.album_message_ids or [self.message_id]
+
+    def __eq__(self, other):
+        if not isinstance(other, TelegramMessage):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in FIELDS)
+
+    def __repr__(self):
+        return f"TelegramMessage(channel_name={self.channel_name!r}, message_id={self.message_id!r})"
@@ -0,0 +1,55 @@
+"""
+Mirror the raw JSON message lake as date/channel-partitioned Parquet
+Run after a scrape (or let the scraper do it with --parquet)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Make the project root importable when run as `python src/raw_to_parquet.py`
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.parquet_lake import PARQUET_ROOT, export_folder
+
+RAW_ROOT = Path("data/raw/telegram_messages")
+
+
+def parse_args():
+    """Command line options for the Parquet export"""
+    parser = argparse.ArgumentParser(description="Export raw Telegram messages to Parquet")
+    parser.add_argument('--date', action='append', default=None,
+                        help="Date folder to export (repeatable; defaults to every folder)")
+    parser.add_argument('--output', default=PARQUET_ROOT,
+                        help="Root of the Parquet lake")
+    parser.add_argument('--force', action='store_true',
+                        help="Rewrite files even if their Parquet copy is up to date")
+    return parser.parse_args()
+
+
+def main():
+    """Entry point"""
+    args = parse_args()
+
+    if not RAW_ROOT.exists():
+        print(" No data directory found!")
+        return
+
+    folders = sorted(d for d in RAW_ROOT.iterdir() if d.is_dir())
+    if args.date:
+        folders = [d for d in folders if d.name in args.date]
+
+    total_files = 0
+    total_rows = 0
+    for folder in folders:
+        written = export_folder(folder, root=args.output, force=args.force)
+        for path, rows in written.items():
+            print(f"    {path}: {rows} rows")
+        total_files += len(written)
+        total_rows += sum(written.values())
+
+    print(f"\n Exported {total_rows} messages into {total_files} Parquet files under {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,39 @@ Telegram Scraper for Medical Channels
 Extract data from Telegram channels
 """
 import os
+import sys
 import json
 import asyncio
+import argparse
+import socket
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from telethon import TelegramClient
-from telethon.errors import FloodWaitError
+from telethon import TelegramClient, events
+from telethon.utils import get_peer_id
+from telethon.errors import FloodWaitError, ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError
+from telethon.tl.types import InputPeerChannel
 import time
 
+# Make the project root importable when run as `python src/scraper.py`
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.rate_limiter import AdaptiveRateLimiter
+from src.utils.checkpoints import CheckpointStore
+from src.utils.download_pool import DownloadPool
+from src.utils.image_store import ImageStore
+from src.utils.raw_io import JsonlWriter, default_compression, raw_suffix
+from src.utils.sharding import ConsistentHashRing
+from src.utils.work_queue import WorkQueue
+from src.utils.channel_registry import ChannelRegistry
+from src.utils.entity_cache import EntityCache
+from src.utils.micro_batcher import MicroBatcher
+from src.utils.metrics import ScraperMetrics
+from src.models.message import TelegramMessage
+from src.utils.photo_sizes import pick_photo_size
+
 # Load environment variables
 load_dotenv()
 
@@ -27,33 +50,155 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Errors meaning a cached id/access_hash is no longer usable
+STALE_ENTITY_ERRORS = (ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError, ValueError)
+
+# Messages per GetHistory request (Telegram's maximum)
+HISTORY_PAGE_SIZE = 100
+
 class TelegramScraper:
-    def __init__(self):
-        """Initialize the scraper with credentials"""
-        self.api_id = int(os.getenv('API_ID'))
+    def __init__(self, channels=None, concurrency=None, sessions=None, registry_path=None, image_size=None):
+        """Initialize the scraper with credentials
+        
+        Args:
+            channels: Optional list of channel usernames (defaults to the channel registry)
+            concurrency: Maximum number of channels scraped at the same time per session
+            sessions: Optional list of session dicts (name, api_id, api_hash, phone);
+                      defaults to load_sessions()
+            registry_path: Channel registry file (CHANNEL_REGISTRY, default config/channels.yml)
+            image_size: Download the smallest photo size whose longest side is at least
+                        this many pixels (SCRAPER_IMAGE_SIZE; None = largest size)
+        """
+        self.api_id = int(os.getenv('API_ID', 0))
         self.api_hash = os.getenv('API_HASH')
         self.phone_number = os.getenv('PHONE_NUMBER')
         
-        # Telegram channels to scrape
-        self.channels = [
-            'CheMed123',        # CheMed Telegram Channel
-            'lobelia4cosmetics',      # Medical products
-            'tikvahpharma',          # Pharmaceuticals
-            'EAHCI',
-            'tenamereja'                    
-            # more channels from et.tgstat.com/medicine
-        ]
+        # Telegram accounts; channels are sharded across them
+        self.sessions = sessions or self.load_sessions()
+        
+        # Telegram channels to scrape, with priority / frequency / depth from the registry
+        registry_path = Path(registry_path or os.getenv('CHANNEL_REGISTRY', 'config/channels.yml'))
+        self.registry = ChannelRegistry(registry_path) if registry_path.exists() else None
+        self.channels = channels or (self.registry.names() if self.registry else [])
+        
+        # Number of channels scraped in parallel over each client
+        self.concurrency = max(1, concurrency or int(os.getenv('SCRAPER_CONCURRENCY', 4)))
+        
+        # One adaptive limiter per client (i.e. per account) for get_entity,
+        # message iteration and downloads; see limiter_for()
+        self.rate_limiters = {}
+        self.session_names = {}
+        
+        # Image download tasks per channel, fed while message iteration continues
+        self.download_workers = max(1, int(os.getenv('SCRAPER_DOWNLOAD_WORKERS', 4)))
+        
+        # Compression of new raw files (RAW_COMPRESSION=gzip|zstd)
+        self.raw_compression = default_compression()
+        
+        # Mirror today's raw files as Parquet after each scrape (SCRAPER_PARQUET=1)
+        self.export_parquet = os.getenv('SCRAPER_PARQUET', '').lower() in ('1', 'true', 'yes')
+        
+        # Size cap for photo downloads (YOLO only needs 640 px)
+        self.image_size = image_size or int(os.getenv('SCRAPER_IMAGE_SIZE', 0)) or None
+        
+        # Throughput, latency and per-channel timings for this run
+        self.metrics = ScraperMetrics()
+        self.metrics_file = os.getenv('SCRAPER_METRICS_FILE', 'logs/scraper_metrics.json')
+        
+        # Records written between fsyncs of the raw JSONL files
+        self.fsync_every = int(os.getenv('SCRAPER_FSYNC_EVERY', 500))
+        
+        # Per-channel progress: pending -> running -> done / failed
+        self.progress = {}
+        
+        # Listener flushes run in worker threads and share one Postgres loader
+        self.loader_lock = threading.Lock()
         
         # Create directories
         self.create_directories()
         
+        # Per-channel high-water marks for incremental runs and backfills
+        self.checkpoints = CheckpointStore()
+        
+        # Hash-keyed image files plus message/photo index
+        self.image_store = ImageStore()
+        
+        # Resolved username -> id/access_hash, so repeat runs skip get_entity
+        self.entity_cache = EntityCache(ttl_hours=float(os.getenv('ENTITY_CACHE_TTL_HOURS', 168)))
+        
         logger.info(f"Initialized scraper for {len(self.channels)} channels")
     
+    def load_sessions(self, path=None):
+        """
+        Load Telegram accounts from a JSON file
+        
+        The file (TELEGRAM_SESSIONS_FILE, default config/sessions.json) holds a
+        list of {"name", "api_id", "api_hash", "phone"} objects. Without it the
+        single account from API_ID / API_HASH / PHONE_NUMBER is used.
+        """
+        path = Path(path or os.getenv('TELEGRAM_SESSIONS_FILE', 'config/sessions.json'))
+        
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                sessions = json.load(f)
+            for session in sessions:
+                session['api_id'] = int(session['api_id'])
+            return sessions
+        
+        return [{
+            'name': 'session',
+            'api_id': self.api_id,
+            'api_hash': self.api_hash,
+            'phone': self.phone_number
+        }]
+    
+    def channel_depth(self, channel_name, max_messages=None):
+        """Messages fetched on a channel's first run: explicit value, registry depth or 50"""
+        if max_messages:
+            return max_messages
+        if self.registry:
+            return self.registry.get(channel_name)['depth']
+        return 50
+    
+    def due_channels(self):
+        """Registry channels whose scrape frequency has elapsed, most urgent first"""
+        if not self.registry:
+            return list(self.channels)
+        due = self.registry.due_channels(self.checkpoints)
+        return [channel for channel in due if channel in self.channels]
+    
+    def limiter_for(self, client):
+        """Rate limiter of the account behind a client (created on first use)"""
+        if client not in self.rate_limiters:
+            self.rate_limiters[client] = AdaptiveRateLimiter(
+                rate=float(os.getenv('SCRAPER_RATE', 5.0))
+            )
+        return self.rate_limiters[client]
+    
+    def named_limiters(self):
+        """Rate limiters keyed by session name (for metrics)"""
+        return {self.session_names.get(client, 'session'): limiter
+                for client, limiter in self.rate_limiters.items()}
+    
+    def report_metrics(self):
+        """Log the headline numbers and write the JSON run summary"""
+        summary = self.metrics.summary(self.named_limiters())
+        path = self.metrics.write_summary(self.metrics_file, self.named_limiters())
+        
+        logger.info(f"Run summary: {summary['messages']} messages ({summary['messages_per_second']}/s), "
+                    f"{summary['images']} images ({summary['image_bytes_per_second']:.0f} B/s), "
+                    f"{summary['flood_wait_seconds']}s flood wait, "
+                    f"get_entity p95 {summary['latency']['get_entity']['p95_seconds']}s, "
+                    f"download_media p95 {summary['latency']['download_media']['p95_seconds']}s")
+        logger.info(f"Metrics written to: {path}")
+        return summary
+    
     def create_directories(self):
         """Create all necessary directories for data storage"""
         directories = [
             'data/raw/images',
             'data/raw/telegram_messages',
+            'data/state',
             'logs'
         ]
         
@@ -61,163 +206,1158 @@ class TelegramScraper:
             Path(directory).mkdir(parents=True, exist_ok=True)
             logger.debug(f"Created directory: {directory}")
     
-    async def scrape_channel(self, client, channel_name, max_messages=50):
+    async def resolve_channel(self, client, channel_name):
+        """
+        Resolve a channel username, preferring the persistent entity cache
+        
+        A cache hit returns an InputPeerChannel built from the stored id and
+        access_hash without any network call; misses and stale entries go
+        through get_entity and are written back to the cache.
+        """
+        session_name = self.session_names.get(client, 'session')
+        
+        cached = self.entity_cache.get(session_name, channel_name)
+        if cached:
+            logger.info(f"Found channel: {cached['title']} (cached)")
+            self.metrics.entity_cache_hits += 1
+            return InputPeerChannel(cached['channel_id'], cached['access_hash'])
+        
+        channel = await self.timed_call(client, 'get_entity', client.get_entity, channel_name)
+        logger.info(f"Found channel: {channel.title}")
+        self.entity_cache.put(session_name, channel_name, channel)
+        return channel
+    
+    async def timed_call(self, client, operation, func, *args, **kwargs):
+        """Rate-limited API call whose latency (without limiter waits) goes into the metrics"""
+        async def timed(*call_args, **call_kwargs):
+            started = time.monotonic()
+            try:
+                return await func(*call_args, **call_kwargs)
+            finally:
+                self.metrics.observe(operation, time.monotonic() - started)
+        
+        return await self.limiter_for(client).call(timed, *args, **kwargs)
+    
+    def forget_stale_entity(self, client, channel_name, error):
+        """Drop a cached entity when Telegram rejected it, so the next run resolves it again"""
+        if isinstance(error, STALE_ENTITY_ERRORS):
+            logger.warning(f"Invalidating cached entity for @{channel_name}: {error}")
+            self.entity_cache.invalidate(self.session_names.get(client, 'session'), channel_name)
+    
+    async def iter_channel_messages(self, client, channel, limit=None, min_id=0, offset_id=0, retries=3):
+        """
+        Iterate over channel messages, one rate-limited history page at a time
+        
+        Each page of up to HISTORY_PAGE_SIZE messages is a single API call, so
+        the limiter is charged (and flood waits are retried) per request, not
+        per message. The next page starts below the last message yielded, so
+        nothing is fetched twice.
+        
+        Args:
+            client: TelegramClient instance
+            channel: Resolved channel entity
+            limit: Maximum number of messages (None for all)
+            min_id: Only return messages newer than this id
+            offset_id: Only return messages older than this id
+            retries: Number of flood waits tolerated per page before giving up
+        """
+        fetched = 0
+        
+        while limit is None or fetched < limit:
+            page_size = HISTORY_PAGE_SIZE if limit is None else min(HISTORY_PAGE_SIZE, limit - fetched)
+            page = await self.timed_call(client, 'get_history', client.get_messages, channel,
+                                         limit=page_size, min_id=min_id, offset_id=offset_id, retries=retries)
+            
+            for message in page:
+                offset_id = message.id
+                fetched += 1
+                yield message
+            
+            # A short page is the end of the history (or of the min_id range)
+            if len(page) < page_size:
+                return
+    
+    async def process_message(self, client, message, channel_name, downloads=None, emit=None):
+        """
+        Extract a message and fetch its image
+        
+        With a DownloadPool the image is queued and the pool hands the record
+        on once the download finished; otherwise the image is downloaded
+        inline and the record is passed to emit straight away.
+        """
+        message_info = self.extract_message_info(message, channel_name)
+        
+        # Download image if present
+        if message.photo and downloads is not None:
+            await downloads.submit(message_info, client, message, channel_name)
+        else:
+            if message.photo:
+                image_path = await self.download_image(client, message, channel_name)
+                if image_path:
+                    message_info.image_path = image_path
+            if emit is not None:
+                emit(message_info)
+        
+        return message_info
+    
+    async def process_album(self, client, messages, channel_name, downloads=None, emit=None):
+        """
+        Extract an album as one post and fetch its images as a unit
+        
+        Same hand-off rules as process_message; the post's images are
+        downloaded concurrently and listed in image_paths.
+        """
+        post_info = self.extract_album_info(messages, channel_name)
+        
+        if any(m.photo for m in messages) and downloads is not None:
+            await downloads.submit(post_info, client, messages, channel_name, download=self.download_album)
+        else:
+            image_paths = await self.download_album(client, messages, channel_name)
+            if image_paths:
+                post_info.image_paths = image_paths
+                post_info.image_path = image_paths[0]
+            if emit is not None:
+                emit(post_info)
+        
+        return post_info
+    
+    async def stream_messages(self, client, channel, channel_name, writer, **iter_options):
+        """
+        Stream messages of a channel into a raw writer as they are produced
+        
+        Only running totals are kept, so memory stays constant however many
+        messages are fetched. The writer is fsynced before returning.
+        
+        Album members arrive back to back, so they are buffered until the
+        grouped_id changes and written as a single post.
+        
+        Returns:
+            Dict with messages, posts, images, min_id and max_id
+        """
+        stats = {'messages': 0, 'posts': 0, 'images': 0, 'min_id': None, 'max_id': None}
+        album = []
+        
+        async def flush_album():
+            if not album:
+                return
+            members = album[:]
+            album.clear()
+            try:
+                await self.process_album(client, members, channel_name, downloads, emit=writer.write)
+                stats['posts'] += 1
+            except Exception as e:
+                logger.error(f"Error processing album {members[0].grouped_id}: {e}")
+        
+        # Images download in the background; their records are written once done
+        async with DownloadPool(self.download_image, workers=self.download_workers,
+                                on_done=writer.write) as downloads:
+            async for message in self.iter_channel_messages(client, channel, **iter_options):
+                if album and message.grouped_id != album[0].grouped_id:
+                    await flush_album()
+                
+                if message.grouped_id:
+                    album.append(message)
+                else:
+                    try:
+                        await self.process_message(client, message, channel_name, downloads, emit=writer.write)
+                        stats['posts'] += 1
+                    except Exception as e:
+                        logger.error(f"Error processing message {message.id}: {e}")
+                        continue
+                
+                stats['messages'] += 1
+                self.metrics.record_message(channel_name)
+                stats['min_id'] = message.id if stats['min_id'] is None else min(stats['min_id'], message.id)
+                stats['max_id'] = message.id if stats['max_id'] is None else max(stats['max_id'], message.id)
+            
+            await flush_album()
+        
+        stats['images'] = downloads.completed
+        writer.checkpoint()
+        return stats
+    
+    async def scrape_channel(self, client, channel_name, max_messages=50, incremental=True):
         """
         Scrape messages from a single Telegram channel
         
+        With a stored checkpoint only messages newer than the channel's
+        high-water mark are fetched (all of them, so no gap is left behind);
+        without one the newest max_messages are fetched.
+        
         Args:
             client: TelegramClient instance
             channel_name: Username of the channel
-            max_messages: Maximum number of messages to scrape
+            max_messages: Maximum number of messages to scrape on a first run
+            incremental: Use the stored high-water mark as min_id
+        
+        Returns:
+            Number of messages scraped
         """
         logger.info(f"Starting to scrape channel: @{channel_name}")
         
         try:
             # Get channel entity
-            channel = await client.get_entity(channel_name)
-            logger.info(f"Found channel: {channel.title}")
+            channel = await self.resolve_channel(client, channel_name)
             
-            messages_data = []
-            image_count = 0
+            checkpoint = self.checkpoints.get(channel_name)
+            min_id = checkpoint['last_message_id'] if incremental else 0
+            limit = None if min_id else max_messages
+            if min_id:
+                logger.info(f"Fetching messages newer than {min_id} from @{channel_name}")
             
-            # Scrape messages
-            async for message in client.iter_messages(channel, limit=max_messages):
-                try:
-                    # Extract message information
-                    message_info = self.extract_message_info(message, channel_name)
+            # Scrape messages straight into today's raw file
+            with self.open_raw_writer(channel_name) as writer:
+                stats = await self.stream_messages(client, channel, channel_name, writer,
+                                                   limit=limit, min_id=min_id)
+            
+            if stats['messages']:
+                logger.info(f" Scraped {stats['messages']} messages, {stats['images']} images "
+                            f"from @{channel_name} into {writer.path}")
+                # Advance the high-water mark only after the data is on disk
+                self.checkpoints.update_latest(channel_name, [stats['min_id'], stats['max_id']])
+            else:
+                logger.info(f"No new messages in @{channel_name}")
+            
+            self.checkpoints.mark_success(channel_name)
+            return stats['messages']
+            
+        except Exception as e:
+            logger.error(f" Error scraping @{channel_name}: {e}")
+            self.forget_stale_entity(client, channel_name, e)
+            raise
+    
+    async def backfill_channel(self, client, channel_name, chunk_size=500, max_chunks=None):
+        """
+        Page older history of a channel in resumable chunks
+        
+        Each chunk starts below the oldest message_id recorded in the checkpoint
+        store (offset_id), is streamed to the channel's backfill file, fsynced
+        and then checkpointed, so an interrupted backfill continues where it stopped.
+        
+        Args:
+            client: TelegramClient instance
+            channel_name: Username of the channel
+            chunk_size: Messages per chunk
+            max_chunks: Stop after this many chunks (None for the whole history)
+        
+        Returns:
+            Number of messages backfilled
+        """
+        logger.info(f"Starting backfill of channel: @{channel_name}")
+        
+        try:
+            channel = await self.resolve_channel(client, channel_name)
+            
+            total = 0
+            chunks = 0
+            
+            with self.open_raw_writer(channel_name, suffix='backfill') as writer:
+                while max_chunks is None or chunks < max_chunks:
+                    checkpoint = self.checkpoints.get(channel_name)
+                    if checkpoint['backfill_complete']:
+                        logger.info(f"Backfill of @{channel_name} already complete")
+                        break
                     
-                    # Download image if present
-                    if message.photo:
-                        image_path = await self.download_image(client, message, channel_name)
-                        if image_path:
-                            message_info['image_path'] = image_path
-                            image_count += 1
+                    offset_id = checkpoint['oldest_message_id'] or 0
+                    stats = await self.stream_messages(client, channel, channel_name, writer,
+                                                       limit=chunk_size, offset_id=offset_id)
                     
-                    messages_data.append(message_info)
+                    if not stats['messages']:
+                        self.checkpoints.update_oldest(channel_name, offset_id, complete=True)
+                        break
                     
-                    # Small delay to avoid rate limits
-                    await asyncio.sleep(0.1)
+                    # A short chunk means the start of the channel was reached
+                    self.checkpoints.update_oldest(channel_name, stats['min_id'],
+                                                   complete=stats['messages'] < chunk_size)
+                    if not checkpoint['last_message_id']:
+                        self.checkpoints.update_latest(channel_name, [stats['min_id'], stats['max_id']])
                     
-                except Exception as e:
-                    logger.error(f"Error processing message {message.id}: {e}")
-                    continue
+                    total += stats['messages']
+                    chunks += 1
+                    logger.info(f"Backfilled chunk {chunks} of @{channel_name}: "
+                                f"ids {stats['min_id']}-{stats['max_id']}")
+            
+            return total
             
-            # Save to JSON
-            if messages_data:
-                self.save_to_json(messages_data, channel_name)
-                logger.info(f" Scraped {len(messages_data)} messages, {image_count} images from @{channel_name}")
+        except Exception as e:
+            logger.error(f" Error backfilling @{channel_name}: {e}")
+            self.forget_stale_entity(client, channel_name, e)
+            raise
+    
+    async def scrape_range(self, client, channel_name, offset_id, min_id=0):
+        """
+        Scrape one explicit id range of a channel: min_id < message_id < offset_id
+        
+        Used by queue workers for backfill ranges. Each range gets its own file
+        so concurrent ranges of a channel never share a writer. Checkpoints are
+        left alone because ranges complete out of order.
+        
+        Returns:
+            Number of messages scraped
+        """
+        logger.info(f"Scraping @{channel_name} ids {min_id + 1}-{offset_id - 1}")
+        
+        try:
+            channel = await self.resolve_channel(client, channel_name)
             
-            return messages_data
+            with self.open_raw_writer(channel_name, suffix=f"range_{min_id + 1}-{offset_id - 1}") as writer:
+                stats = await self.stream_messages(client, channel, channel_name, writer,
+                                                   offset_id=offset_id, min_id=min_id)
+            return stats['messages']
             
         except Exception as e:
-            logger.error(f" Error scraping @{channel_name}: {e}")
-            return []
+            logger.error(f" Error scraping range of @{channel_name}: {e}")
+            self.forget_stale_entity(client, channel_name, e)
+            raise
     
     def extract_message_info(self, message, channel_name):
-        """Extract relevant information from a Telegram message"""
+        """Extract relevant information from a Telegram message as a TelegramMessage"""
+        return TelegramMessage.from_telegram(message, channel_name)
+    
+    def extract_album_info(self, messages, channel_name):
+        """
+        Merge the messages of an album (shared grouped_id) into one post record
+        
+        The post takes the id, text and metrics of the captioned message (the
+        first one when none has a caption) and lists every member id.
+        """
+        messages = sorted(messages, key=lambda m: m.id)
+        primary = self.album_primary(messages)
+        
+        post_info = self.extract_message_info(primary, channel_name)
+        post_info.has_media = any(m.media is not None for m in messages)
+        post_info.album_message_ids = [m.id for m in messages]
+        return post_info
+    
+    @staticmethod
+    def album_primary(messages):
+        """The message an album post is stored under: the captioned one, else the lowest id"""
+        messages = sorted(messages, key=lambda m: m.id)
+        return next((m for m in messages if m.text), messages[0])
+    
+    def extract_metrics(self, message, channel_name):
+        """Only the engagement fields of a message (for metric refreshes)"""
         return {
             'message_id': message.id,
             'channel_name': channel_name,
-            'message_date': message.date.isoformat() if message.date else None,
-            'message_text': message.text or '',
-            'has_media': message.media is not None,
             'views': message.views or 0,
-            'forwards': message.forwards or 0,
-            'scraped_at': datetime.now().isoformat()
+            'forwards': message.forwards or 0
         }
     
-    async def download_image(self, client, message, channel_name):
-        """Download image from a message"""
+    async def refresh_metrics(self, client, channel_name, message_ids, batch_size=100):
+        """
+        Re-fetch views and forwards for known messages in batched get_messages calls
+        
+        Only the metric fields are kept; text and media are not downloaded again.
+        Deleted messages come back as None and are skipped.
+        
+        Returns:
+            List of metric dicts
+        """
+        channel = await self.resolve_channel(client, channel_name)
+        metrics = []
+        
+        for start in range(0, len(message_ids), batch_size):
+            batch = list(message_ids[start:start + batch_size])
+            messages = await self.timed_call(client, 'get_messages', client.get_messages, channel, ids=batch)
+            metrics.extend(self.extract_metrics(m, channel_name) for m in messages if m is not None)
+        
+        logger.info(f"Refreshed metrics of {len(metrics)}/{len(message_ids)} messages from @{channel_name}")
+        return metrics
+    
+    async def download_image(self, client, message, channel_name, post_id=None):
+        """
+        Download image from a message into the content-addressed store
+        
+        The download is skipped when the message or its Telegram photo id is
+        already indexed; identical bytes are stored only once. With an
+        image_size cap the nearest photo size at or above it is fetched.
+        
+        Args:
+            post_id: Id of the album post the message belongs to (its raw record)
+        """
         try:
-            # Create image directory
-            image_dir = Path(f"data/raw/images/{channel_name}")
-            image_dir.mkdir(parents=True, exist_ok=True)
+            photo_id = getattr(message.photo, 'id', None)
+            
+            # Reuse an image we already have for this message or photo
+            image_path = self.image_store.lookup(channel_name, message.id, photo_id, post_id=post_id)
+            if image_path:
+                logger.debug(f"Image already stored for message {message.id}: {image_path}")
+                self.metrics.images_deduplicated += 1
+                return image_path
             
-            # Download image
-            image_path = image_dir / f"{message.id}.jpg"
-            await message.download_media(file=str(image_path))
+            # Download image (a smaller server-side size when capped)
+            size, variant = pick_photo_size(message.photo, self.image_size)
+            download_options = {'thumb': size} if size is not None else {}
+            data = await self.timed_call(client, 'download_media', message.download_media,
+                                         file=bytes, **download_options)
+            if not data:
+                return None
+            self.metrics.record_image(channel_name, len(data))
+            image_path = self.image_store.put(data, channel_name, message.id, photo_id, variant=variant,
+                                              post_id=post_id)
             
             logger.debug(f"Downloaded image: {image_path}")
-            return str(image_path)
+            return image_path
             
         except Exception as e:
             logger.error(f"Failed to download image for message {message.id}: {e}")
             return None
     
-    def save_to_json(self, messages, channel_name):
-        """Save scraped messages to JSON file"""
-        # Get today's date for folder naming
-        today = datetime.now().strftime('%Y-%m-%d')
+    async def fetch_originals(self, client, channel_name, message_ids, batch_size=100):
+        """
+        Replace size-capped images of a channel with the largest photo size
         
-        # Create date directory
-        date_dir = Path(f"data/raw/telegram_messages/{today}")
-        date_dir.mkdir(parents=True, exist_ok=True)
+        Messages are re-fetched in batched get_messages calls; the index is
+        repointed to the new blob. The capped files stay on disk because raw
+        records still reference them.
+        
+        Returns:
+            Number of images upgraded
+        """
+        channel = await self.resolve_channel(client, channel_name)
+        upgraded = 0
+        
+        for start in range(0, len(message_ids), batch_size):
+            batch = list(message_ids[start:start + batch_size])
+            messages = await self.timed_call(client, 'get_messages', client.get_messages, channel, ids=batch)
+            for message in messages:
+                if message is None or not message.photo:
+                    continue
+                try:
+                    data = await self.timed_call(client, 'download_media', message.download_media, file=bytes)
+                except Exception as e:
+                    logger.error(f"Failed to download original of message {message.id}: {e}")
+                    continue
+                if data:
+                    self.metrics.record_image(channel_name, len(data))
+                    self.image_store.put(data, channel_name, message.id, message.photo.id)
+                    upgraded += 1
         
-        # Save to file
-        file_path = date_dir / f"{channel_name}.json"
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(messages, f, ensure_ascii=False, indent=2)
+        logger.info(f"Fetched {upgraded}/{len(message_ids)} original images from @{channel_name}")
+        return upgraded
+    
+    async def download_album(self, client, messages, channel_name):
+        """
+        Download the images of an album concurrently; returns their paths in message order
         
-        logger.info(f"Saved data to: {file_path}")
-        return str(file_path)
+        Every image is indexed under its own message id and linked to the post's
+        id, the only one with a raw row, so detections map back to the post.
+        """
+        post_id = self.album_primary(messages).id
+        photos = sorted((m for m in messages if m.photo), key=lambda m: m.id)
+        paths = await asyncio.gather(*(self.download_image(client, m, channel_name, post_id=post_id)
+                                       for m in photos))
+        return [path for path in paths if path]
     
-    async def run(self):
-        """Main function to run the scraper"""
-        logger.info(" Starting Telegram Scraper...")
+    def export_today_parquet(self):
+        """Refresh the Parquet copy of today's raw files (when export_parquet is on)"""
+        if not self.export_parquet:
+            return
         
-        # Initialize Telegram client
-        client = TelegramClient('session', self.api_id, self.api_hash)
+        from src.utils.parquet_lake import export_folder
         
+        today = datetime.now().strftime('%Y-%m-%d')
         try:
-            # Connect to Telegram
-            await client.start(phone=self.phone_number)
-            logger.info(" Connected to Telegram!")
-            
-            # Scrape each channel
-            for channel in self.channels:
+            written = export_folder(Path(f"data/raw/telegram_messages/{today}"))
+            logger.info(f"Exported {sum(written.values())} messages to {len(written)} Parquet files")
+        except Exception as e:
+            logger.error(f"Parquet export failed: {e}")
+    
+    def open_raw_writer(self, channel_name, suffix=None):
+        """
+        Open today's raw JSONL file for a channel in append mode
+        
+        Files live in data/raw/telegram_messages/{date}/{channel}[_{suffix}].jsonl,
+        with .gz/.zst appended when RAW_COMPRESSION is gzip/zstd; repeated
+        runs on the same day append to the same file.
+        """
+        # Get today's date for folder naming
+        today = datetime.now().strftime('%Y-%m-%d')
+        date_dir = Path(f"data/raw/telegram_messages/{today}")
+        
+        stem = f"{channel_name}_{suffix}" if suffix else channel_name
+        file_name = stem + raw_suffix(self.raw_compression)
+        return JsonlWriter(date_dir / file_name, fsync_every=self.fsync_every)
+    
+    async def scrape_all(self, client, channels=None, max_messages=None, incremental=True,
+                         backfill=False, chunk_size=500, max_chunks=None):
+        """
+        Scrape several channels concurrently over one client
+        
+        Args:
+            client: Connected TelegramClient (or any object with the same interface)
+            channels: Channel usernames to scrape (defaults to self.channels)
+            max_messages: Messages per channel on a first run (defaults to the registry depth)
+            incremental: Only fetch messages newer than each channel's checkpoint
+            backfill: Page older history instead of fetching new messages
+            chunk_size: Messages per backfill chunk
+            max_chunks: Backfill chunks per channel (None for the whole history)
+        
+        Returns:
+            Dict mapping channel name to the number of scraped messages
+        """
+        channels = list(channels or self.channels)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self.progress.update({channel: 'pending' for channel in channels})
+        session_name = self.session_names.get(client, 'session')
+        finished = 0
+        
+        logger.info(f"[{session_name}] Scraping {len(channels)} channels with concurrency {self.concurrency}")
+        
+        async def worker(channel):
+            nonlocal finished
+            async with semaphore:
+                self.progress[channel] = 'running'
+                started = time.monotonic()
+                scraped = 0
+                
                 try:
-                    await self.scrape_channel(client, channel, max_messages=50)
-                    
-                    # Wait between channels to avoid rate limits
-                    logger.info(f"Waiting 5 seconds before next channel...")
-                    await asyncio.sleep(5)
+                    if backfill:
+                        scraped = await self.backfill_channel(client, channel, chunk_size=chunk_size,
+                                                               max_chunks=max_chunks)
+                    else:
+                        scraped = await self.scrape_channel(client, channel,
+                                                             max_messages=self.channel_depth(channel, max_messages),
+                                                             incremental=incremental)
+                    self.progress[channel] = 'done'
                     
                 except FloodWaitError as e:
-                    logger.warning(f"Rate limited. Waiting {e.seconds} seconds...")
-                    await asyncio.sleep(e.seconds)
-                    continue
+                    # The limiter already recorded the wait when its retries ran out
+                    logger.warning(f"Rate limited on @{channel} for {e.seconds} seconds")
+                    self.progress[channel] = 'failed'
                 except Exception as e:
                     logger.error(f"Failed to scrape {channel}: {e}")
+                    self.progress[channel] = 'failed'
+                
+                finished += 1
+                elapsed = time.monotonic() - started
+                self.metrics.record_channel(channel, elapsed, scraped, self.progress[channel])
+                logger.info(f"[{session_name} {finished}/{len(channels)}] @{channel} {self.progress[channel]} "
+                            f"({scraped} messages in {elapsed:.1f}s, "
+                            f"rate {self.limiter_for(client).rate:.2f} req/s)")
+                
+                return scraped
+        
+        results = await asyncio.gather(*(worker(channel) for channel in channels))
+        return dict(zip(channels, results))
+    
+    def enqueue_channels(self, queue, channels=None, backfill=False, range_size=None, chunk_size=500):
+        """
+        Coordinator: put channels (or backfill ranges) on the work queue
+        
+        With backfill and range_size, each channel's history below its oldest
+        checkpointed message is split into fixed id ranges that workers can
+        scrape independently.
+        
+        Returns:
+            Number of tasks added
+        """
+        added = 0
+        
+        for channel in channels or self.channels:
+            if not backfill:
+                added += queue.enqueue(channel, 'scrape') is not None
+                continue
+            
+            checkpoint = self.checkpoints.get(channel)
+            upper = checkpoint['oldest_message_id'] or checkpoint['last_message_id']
+            
+            if range_size and upper:
+                # Ranges run from the oldest known message down to the start of the channel
+                # Each range covers min_id < message_id < offset_id, i.e. range_size ids;
+                # ranges already scraped (done) are not queued again
+                while upper > 1:
+                    lower = max(0, upper - 1 - range_size)
+                    added += queue.enqueue(channel, 'range', {'offset_id': upper, 'min_id': lower},
+                                           skip_done=True) is not None
+                    upper = lower + 1
+            else:
+                added += queue.enqueue(channel, 'backfill', {'chunk_size': chunk_size}) is not None
+        
+        logger.info(f"Enqueued {added} tasks; queue: {queue.stats()}")
+        return added
+    
+    async def run_task(self, client, task, max_messages=None, incremental=True):
+        """Execute one leased work-queue task"""
+        params = task['params']
+        
+        if task['kind'] == 'scrape':
+            return await self.scrape_channel(client, task['channel_name'],
+                                             max_messages=self.channel_depth(task['channel_name'], max_messages),
+                                             incremental=incremental)
+        if task['kind'] == 'backfill':
+            return await self.backfill_channel(client, task['channel_name'],
+                                               chunk_size=params.get('chunk_size', 500),
+                                               max_chunks=params.get('max_chunks'))
+        if task['kind'] == 'range':
+            return await self.scrape_range(client, task['channel_name'], params['offset_id'],
+                                           min_id=params.get('min_id', 0))
+        
+        raise ValueError(f"Unknown task kind: {task['kind']}")
+    
+    async def work_queue(self, client, queue, worker_id=None, poll_interval=10, exit_when_idle=True,
+                         **task_options):
+        """
+        Worker: lease tasks, scrape them and acknowledge them
+        
+        self.concurrency lease loops run over the one client. While a task
+        runs, its lease is renewed every third of the lease period; if the
+        worker dies the lease expires and another worker picks the task up.
+        
+        Returns:
+            Number of tasks completed by this worker
+        """
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        heartbeat_every = max(1, queue.lease_seconds / 3)
+        completed = 0
+        
+        async def heartbeat(task):
+            while True:
+                await asyncio.sleep(heartbeat_every)
+                # Leases are owned per slot ("{worker_id}/{slot}"), not by the bare worker id
+                if not queue.heartbeat(task['task_id'], task['lease_owner']):
+                    logger.warning(f"[{task['lease_owner']}] Lost lease on task {task['task_id']}")
+                    return
+        
+        async def lease_loop(slot):
+            nonlocal completed
+            while True:
+                task = queue.lease(f"{worker_id}/{slot}")
+                if task is None:
+                    if exit_when_idle:
+                        return
+                    await asyncio.sleep(poll_interval)
                     continue
+                
+                owner = task['lease_owner']
+                logger.info(f"[{owner}] Leased task {task['task_id']}: {task['kind']} @{task['channel_name']} "
+                            f"(attempt {task['attempts']})")
+                beat = asyncio.create_task(heartbeat(task))
+                
+                try:
+                    scraped = await self.run_task(client, task, **task_options)
+                    queue.ack(task['task_id'], owner)
+                    completed += 1
+                    logger.info(f"[{owner}] Finished task {task['task_id']} ({scraped} messages)")
+                except Exception as e:
+                    queue.fail(task['task_id'], owner, e)
+                    logger.error(f"[{owner}] Task {task['task_id']} failed: {e}")
+                finally:
+                    beat.cancel()
+        
+        await asyncio.gather(*(lease_loop(slot) for slot in range(self.concurrency)))
+        logger.info(f"[{worker_id}] Worker done: {completed} tasks; queue: {queue.stats()}")
+        return completed
+    
+    def create_clients(self):
+        """One TelegramClient per configured session, keyed by session name"""
+        # flood_sleep_threshold=0 hands every flood wait to our rate limiters
+        return {
+            session['name']: TelegramClient(session['name'], session['api_id'], session['api_hash'],
+                                            flood_sleep_threshold=0)
+            for session in self.sessions
+        }
+    
+    async def scrape_shards(self, clients, channels, **scrape_options):
+        """Shard channels across sessions by consistent hashing and scrape every shard in parallel"""
+        assignment = ConsistentHashRing(list(clients)).assign(channels)
+        for name, shard in assignment.items():
+            logger.info(f"Session {name}: {len(shard)} channels")
+        
+        await asyncio.gather(*(
+            self.scrape_all(clients[name], shard, **scrape_options)
+            for name, shard in assignment.items() if shard
+        ))
+    
+    async def run(self, client=None, clients=None, due_only=False, schedule=False, **scrape_options):
+        """
+        Main function to run the scraper
+        
+        Channels are sharded across sessions by consistent hashing, so a
+        channel sticks to one account; every account runs its own worker
+        pool and rate limiter.
+        
+        Args:
+            client: Optional single pre-built client
+            clients: Optional dict of session name -> pre-built client
+            due_only: Only scrape channels whose registry frequency has elapsed
+            schedule: Keep running, scraping channels whenever they become due
+            scrape_options: Passed to scrape_all (max_messages, incremental, backfill, ...)
+        """
+        logger.info(" Starting Telegram Scraper...")
+        
+        # Initialize Telegram clients
+        if client is not None:
+            clients = {'session': client}
+        elif clients is None:
+            clients = self.create_clients()
+        
+        phones = {session['name']: session.get('phone') for session in self.sessions}
+        self.session_names = {c: name for name, c in clients.items()}
+        self.progress = {}
+        
+        try:
+            # Connect to Telegram
+            for name, session_client in clients.items():
+                await session_client.start(phone=phones.get(name, self.phone_number))
+            logger.info(f" Connected to Telegram with {len(clients)} session(s)!")
+            
+            if schedule:
+                await self.run_schedule(clients, **scrape_options)
+            else:
+                channels = self.due_channels() if due_only else self.channels
+                await self.scrape_shards(clients, channels, **scrape_options)
             
             logger.info(" Scraping completed successfully!")
+            self.export_today_parquet()
+            logger.info(f"Image store: {self.image_store.stats()}")
+            self.report_metrics()
             
         except Exception as e:
             logger.error(f"Fatal error: {e}")
+        finally:
+            for session_client in clients.values():
+                await session_client.disconnect()
+    
+    async def run_schedule(self, clients, min_sleep=30, max_sleep=3600, max_passes=None, **scrape_options):
+        """
+        Scheduler loop: scrape whatever is due, then sleep until the next channel is due
+        
+        Hot channels (short frequency) are polled every few minutes while
+        dormant ones are only touched once their longer interval elapses.
+        
+        Args:
+            clients: Connected clients keyed by session name
+            min_sleep: Lower bound between passes, in seconds
+            max_sleep: Upper bound between passes, in seconds
+            max_passes: Stop after this many passes (None to run forever)
+        """
+        passes = 0
+        
+        while max_passes is None or passes < max_passes:
+            due = self.due_channels()
+            if due:
+                logger.info(f"Due channels: {due}")
+                await self.scrape_shards(clients, due, **scrape_options)
+                self.export_today_parquet()
+            passes += 1
+            
+            wait = self.registry.seconds_until_next_due(self.checkpoints) if self.registry else max_sleep
+            wait = min(max_sleep, max(min_sleep, wait or 0))
+            if max_passes is None or passes < max_passes:
+                logger.info(f"Next scheduler pass in {wait:.0f} seconds")
+                await asyncio.sleep(wait)
+    
+    async def handle_new_message(self, client, message, batcher, peer_names, album=None):
+        """
+        Handle one live message: download its image and buffer the record
+        
+        Args:
+            client: Client the update arrived on
+            message: The new Telegram message (the first one of an album)
+            batcher: MicroBatcher the record is added to
+            peer_names: Map of peer id -> channel username for the listened channels
+            album: All messages of an album, which are stored as one post
+        """
+        channel_name = peer_names.get(message.chat_id)
+        if channel_name is None:
+            return
+        
+        try:
+            if album:
+                message_info = await self.process_album(client, album, channel_name)
+            else:
+                message_info = await self.process_message(client, message, channel_name)
+            await batcher.add(message_info)
+        except Exception as e:
+            logger.error(f"Error processing live message {message.id} from @{channel_name}: {e}")
+    
+    def write_live_batch(self, batch, loader=None):
+        """
+        Write a micro-batch of live messages to the raw store and Postgres
+        
+        Blocking; runs in a worker thread. Records are appended to today's raw
+        JSONL files first (the raw lake is the source of truth) and a failed
+        raw write raises so the batch is retried. A failed Postgres insert is
+        only logged: the rows can be reloaded from the raw files.
+        
+        Returns:
+            Message ids written per channel
+        """
+        by_channel = {}
+        for message_info in batch:
+            by_channel.setdefault(message_info.channel_name, []).append(message_info)
+        
+        for channel_name, messages in by_channel.items():
+            with self.open_raw_writer(channel_name) as writer:
+                for message_info in messages:
+                    writer.write(message_info)
+        
+        if loader is not None:
+            try:
+                with self.loader_lock:
+                    loader.load_messages(batch)
+            except Exception as e:
+                logger.error(f"Failed to load {len(batch)} live messages into Postgres: {e}")
+        
+        return {channel_name: [i for m in messages for i in m.message_ids]
+                for channel_name, messages in by_channel.items()}
+    
+    async def flush_live_batch(self, batch, loader=None):
+        """
+        Persist a micro-batch of live messages, then checkpoint it
+        
+        The writes run in the default executor; checkpoints only advance on
+        the event loop once they succeeded.
+        """
+        loop = asyncio.get_running_loop()
+        written = await loop.run_in_executor(None, self.write_live_batch, batch, loader)
+        
+        for channel_name, ids in written.items():
+            self.checkpoints.update_latest(channel_name, ids)
+            self.checkpoints.mark_success(channel_name)
+        
+        logger.info(f"Flushed {len(batch)} live messages from {len(written)} channels")
+    
+    async def listen(self, client, channels, loader=None, batch_size=100, flush_interval=2.0):
+        """
+        Real-time mode: subscribe to new-message events of the given channels
+        
+        Messages are streamed into the raw store (and Postgres when a loader
+        is given) in micro-batches of up to batch_size records or
+        flush_interval seconds. Runs until the client disconnects.
+        """
+        peer_names = {}
+        for channel_name in channels:
+            try:
+                peer_names[get_peer_id(await self.resolve_channel(client, channel_name))] = channel_name
+            except Exception as e:
+                logger.error(f"Cannot listen to @{channel_name}: {e}")
+        
+        async def flush(batch):
+            await self.flush_live_batch(batch, loader)
+        
+        batcher = MicroBatcher(flush, max_size=batch_size, max_delay=flush_interval)
+        
+        async def on_new_message(event):
+            # Album members arrive again, together, as one Album event
+            if event.message.grouped_id:
+                return
+            await self.handle_new_message(client, event.message, batcher, peer_names)
+        
+        async def on_album(event):
+            await self.handle_new_message(client, event.messages[0], batcher, peer_names, album=event.messages)
+        
+        client.add_event_handler(on_new_message, events.NewMessage(chats=list(peer_names)))
+        client.add_event_handler(on_album, events.Album(chats=list(peer_names)))
+        logger.info(f"[{self.session_names.get(client, 'session')}] Listening to {len(peer_names)} channels")
+        
+        flusher = asyncio.create_task(batcher.run())
+        try:
+            await client.run_until_disconnected()
+        finally:
+            flusher.cancel()
+            client.remove_event_handler(on_new_message)
+            client.remove_event_handler(on_album)
+            if not await batcher.flush():
+                logger.error(f"Listener stopped with {batcher.pending} unflushed messages")
+            logger.info(f"Listener stored {batcher.items} messages in {batcher.batches} batches")
+            self.report_metrics()
+    
+    async def run_listener(self, client=None, clients=None, load_to_postgres=True, catch_up=True,
+                           batch_size=100, flush_interval=2.0, **scrape_options):
+        """
+        Long-running listener over all sessions
+        
+        An incremental pass first fills the gap since the last checkpoint,
+        then every session listens to its shard of channels.
+        """
+        if client is not None:
+            clients = {'session': client}
+        elif clients is None:
+            clients = self.create_clients()
+        
+        phones = {session['name']: session.get('phone') for session in self.sessions}
+        self.session_names = {c: name for name, c in clients.items()}
+        
+        loader = None
+        if load_to_postgres:
+            from src.load_to_postgres import DataLoader
+            loader = DataLoader()
+            loader.create_raw_schema()
+        
+        try:
+            for name, session_client in clients.items():
+                await session_client.start(phone=phones.get(name, self.phone_number))
+            
+            if catch_up:
+                await self.scrape_shards(clients, self.channels, **scrape_options)
+            
+            assignment = ConsistentHashRing(list(clients)).assign(self.channels)
+            await asyncio.gather(*(
+                self.listen(clients[name], shard, loader=loader, batch_size=batch_size,
+                            flush_interval=flush_interval)
+                for name, shard in assignment.items() if shard
+            ))
+        finally:
+            for session_client in clients.values():
+                await session_client.disconnect()
+            if loader is not None:
+                loader.cursor.close()
+                loader.connection.close()
+    
+    async def run_refresh(self, client=None, clients=None, max_age_days=7, batch_size=100):
+        """
+        Metrics refresh pass: update views/forwards of messages younger than max_age_days
+        
+        Message ids come from raw.telegram_messages; each session refreshes
+        its shard of channels and every channel is bulk-updated as soon as
+        its metrics are fetched.
+        
+        Returns:
+            Number of rows updated
+        """
+        from src.load_to_postgres import DataLoader
+        
+        if client is not None:
+            clients = {'session': client}
+        elif clients is None:
+            clients = self.create_clients()
+        
+        phones = {session['name']: session.get('phone') for session in self.sessions}
+        self.session_names = {c: name for name, c in clients.items()}
+        
+        loader = DataLoader()
+        loader.create_raw_schema()
+        recent = loader.recent_message_ids(max_age_days=max_age_days, channels=self.channels)
+        logger.info(f"Refreshing metrics of {sum(len(ids) for ids in recent.values())} messages "
+                    f"younger than {max_age_days} days")
+        updated = 0
+        
+        async def refresh_shard(session_client, channels):
+            nonlocal updated
+            for channel_name in channels:
+                try:
+                    metrics = await self.refresh_metrics(session_client, channel_name, recent[channel_name],
+                                                         batch_size=batch_size)
+                    updated += loader.update_message_metrics(metrics)
+                except Exception as e:
+                    logger.error(f"Failed to refresh metrics of @{channel_name}: {e}")
+                    self.forget_stale_entity(session_client, channel_name, e)
+        
+        try:
+            for name, session_client in clients.items():
+                await session_client.start(phone=phones.get(name, self.phone_number))
+            
+            assignment = ConsistentHashRing(list(clients)).assign(list(recent))
+            await asyncio.gather(*(
+                refresh_shard(clients[name], shard) for name, shard in assignment.items() if shard
+            ))
+            logger.info(f" Updated metrics of {updated} messages")
+            self.report_metrics()
+            return updated
+        finally:
+            for session_client in clients.values():
+                await session_client.disconnect()
+            loader.cursor.close()
+            loader.connection.close()
+    
+    async def run_originals(self, client=None, clients=None, batch_size=100):
+        """
+        Originals-later pass: upgrade every size-capped image to the largest size
+        
+        Returns:
+            Number of images upgraded
+        """
+        if client is not None:
+            clients = {'session': client}
+        elif clients is None:
+            clients = self.create_clients()
+        
+        phones = {session['name']: session.get('phone') for session in self.sessions}
+        self.session_names = {c: name for name, c in clients.items()}
+        
+        pending = self.image_store.pending_originals(channels=self.channels)
+        logger.info(f"Fetching originals of {sum(len(ids) for ids in pending.values())} size-capped images")
+        upgraded = 0
+        
+        async def upgrade_shard(session_client, channels):
+            nonlocal upgraded
+            for channel_name in channels:
+                try:
+                    upgraded += await self.fetch_originals(session_client, channel_name, pending[channel_name],
+                                                           batch_size=batch_size)
+                except Exception as e:
+                    logger.error(f"Failed to fetch originals of @{channel_name}: {e}")
+                    self.forget_stale_entity(session_client, channel_name, e)
+        
+        try:
+            for name, session_client in clients.items():
+                await session_client.start(phone=phones.get(name, self.phone_number))
+            
+            assignment = ConsistentHashRing(list(clients)).assign(list(pending))
+            await asyncio.gather(*(
+                upgrade_shard(clients[name], shard) for name, shard in assignment.items() if shard
+            ))
+            logger.info(f" Upgraded {upgraded} images to full size")
+            logger.info(f"Image store: {self.image_store.stats()}")
+            self.report_metrics()
+            return upgraded
+        finally:
+            for session_client in clients.values():
+                await session_client.disconnect()
+    
+    async def run_worker(self, queue, client=None, session=None, **worker_options):
+        """
+        Run this process as a work-queue worker on one session
+        
+        Args:
+            queue: WorkQueue shared with the coordinator
+            client: Optional pre-built client
+            session: Session name to use (defaults to the first configured session)
+            worker_options: Passed to work_queue (worker_id, exit_when_idle, max_messages, ...)
+        """
+        config = next((s for s in self.sessions if s['name'] == session), self.sessions[0])
+        if client is None:
+            client = self.create_clients()[config['name']]
+        self.session_names = {client: config['name']}
+        
+        try:
+            await client.start(phone=config.get('phone') or self.phone_number)
+            logger.info(f" Worker connected to Telegram as session {config['name']}")
+            completed = await self.work_queue(client, queue, **worker_options)
+            self.report_metrics()
+            return completed
         finally:
             await client.disconnect()
 
+def parse_args():
+    """Command line options for the scraper"""
+    parser = argparse.ArgumentParser(description="Scrape medical Telegram channels")
+    parser.add_argument('--max-messages', type=int, default=None,
+                        help="Messages per channel on a first run (defaults to the registry depth)")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore checkpoints and re-fetch the newest messages")
+    parser.add_argument('--backfill', action='store_true',
+                        help="Page older history in resumable chunks")
+    parser.add_argument('--chunk-size', type=int, default=500,
+                        help="Messages per backfill chunk")
+    parser.add_argument('--max-chunks', type=int, default=None,
+                        help="Backfill chunks per channel in this run")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help="Channels scraped in parallel")
+    parser.add_argument('--due-only', action='store_true',
+                        help="Only scrape channels whose registry frequency has elapsed")
+    parser.add_argument('--schedule', action='store_true',
+                        help="Run continuously, scraping channels as they become due")
+    parser.add_argument('--listen', action='store_true',
+                        help="Stream new messages in real time (after an incremental catch-up pass)")
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help="Live mode: messages per micro-batch")
+    parser.add_argument('--flush-interval', type=float, default=2.0,
+                        help="Live mode: seconds before a partial micro-batch is flushed")
+    parser.add_argument('--no-postgres', action='store_true',
+                        help="Live mode: only write the raw files, skip loading into PostgreSQL")
+    parser.add_argument('--refresh-metrics', action='store_true',
+                        help="Only re-fetch views/forwards of recent messages and update PostgreSQL")
+    parser.add_argument('--max-age-days', type=int, default=7,
+                        help="Metrics refresh: only messages posted within this many days")
+    parser.add_argument('--image-size', type=int, default=None,
+                        help="Download the nearest photo size at or above this many pixels (e.g. 640)")
+    parser.add_argument('--fetch-originals', action='store_true',
+                        help="Only re-download size-capped images at the largest size")
+    parser.add_argument('--parquet', action='store_true',
+                        help="Also mirror today's raw files as date/channel-partitioned Parquet")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve Prometheus metrics on this port at /metrics while running")
+    parser.add_argument('--enqueue', action='store_true',
+                        help="Coordinator: put channels (or backfill ranges) on the work queue and exit")
+    parser.add_argument('--range-size', type=int, default=None,
+                        help="With --enqueue --backfill: split history into id ranges of this size")
+    parser.add_argument('--worker', action='store_true',
+                        help="Worker: lease and scrape tasks from the work queue")
+    parser.add_argument('--session', default=None,
+                        help="Session a worker uses (defaults to the first configured session)")
+    parser.add_argument('--queue', default='data/state/work_queue.db',
+                        help="Work queue database shared by coordinator and workers")
+    parser.add_argument('--lease-seconds', type=int, default=300,
+                        help="Task lease duration before another worker may take it over")
+    parser.add_argument('--keep-polling', action='store_true',
+                        help="Worker keeps waiting for new tasks instead of exiting when idle")
+    return parser.parse_args()
+
 def main():
     """Entry point for the scraper"""
+    args = parse_args()
+    
     print("="*50)
     print("TELEGRAM MEDICAL CHANNEL SCRAPER")
     print("="*50)
     
     # Check if credentials are set
-    if not os.getenv('API_ID') or not os.getenv('API_HASH'):
+    sessions_file = os.getenv('TELEGRAM_SESSIONS_FILE', 'config/sessions.json')
+    if (not os.getenv('API_ID') or not os.getenv('API_HASH')) and not Path(sessions_file).exists():
         print("ERROR: API credentials not found!")
-        print("Please add API_ID and API_HASH to your .env file")
+        print(f"Please add API_ID and API_HASH to your .env file (or list accounts in {sessions_file})")
         print("Check the .env.example file for reference")
         return
     
-    print(f"Channels to scrape: {['chemed_ethiopia', 'lobelia4cosmetics', 'tikvahpharma']}")
+    scraper = TelegramScraper(concurrency=args.concurrency, image_size=args.image_size)
+    scraper.export_parquet = scraper.export_parquet or args.parquet
+    
+    print(f"Channels to scrape: {scraper.due_channels() if args.due_only else scraper.channels}")
     print(f"Data will be saved to: data/raw/")
     print("\nStarting in 3 seconds...")
     time.sleep(3)
     
+    if args.metrics_port:
+        scraper.metrics.serve(args.metrics_port, limiters=scraper.named_limiters)
+        print(f"Prometheus metrics on http://localhost:{args.metrics_port}/metrics")
+    
+    # Distributed mode: coordinator fills the queue, workers drain it
+    if args.enqueue or args.worker:
+        queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds)
+        if args.enqueue:
+            channels = scraper.due_channels() if args.due_only else None
+            scraper.enqueue_channels(queue, channels=channels, backfill=args.backfill,
+                                     range_size=args.range_size, chunk_size=args.chunk_size)
+        else:
+            asyncio.run(scraper.run_worker(queue, session=args.session, exit_when_idle=not args.keep_polling,
+                                           max_messages=args.max_messages, incremental=not args.full))
+        queue.close()
+        return
+    
+    # Engagement refresh mode
+    if args.refresh_metrics:
+        asyncio.run(scraper.run_refresh(max_age_days=args.max_age_days))
+        return
+    
+    # Originals-later backfill of size-capped images
+    if args.fetch_originals:
+        asyncio.run(scraper.run_originals())
+        return
+    
+    # Real-time mode
+    if args.listen:
+        asyncio.run(scraper.run_listener(
+            load_to_postgres=not args.no_postgres,
+            batch_size=args.batch_size,
+            flush_interval=args.flush_interval,
+            max_messages=args.max_messages
+        ))
+        return
+    
     # Run the scraper
-    scraper = TelegramScraper()
-    asyncio.run(scraper.run())
+    asyncio.run(scraper.run(
+        due_only=args.due_only,
+        schedule=args.schedule,
+        max_messages=args.max_messages,
+        incremental=not args.full,
+        backfill=args.backfill,
+        chunk_size=args.chunk_size,
+        max_chunks=args.max_chunks
+    ))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
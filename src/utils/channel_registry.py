@@ -0,0 +1,90 @@
+"""
+Channel registry loaded from config/channels.yml
+Holds per-channel priority, scrape frequency and depth, and decides which
+channels are due based on the last successful scrape in the checkpoint store
+"""
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import yaml
+
+DEFAULTS = {
+    'priority': 1,
+    'frequency': '1d',
+    'depth': 50,
+    'enabled': True
+}
+
+_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def parse_frequency(value):
+    """Turn '15m', '6h', '1d' (or a number of minutes) into a timedelta"""
+    if isinstance(value, (int, float)):
+        return timedelta(minutes=value)
+
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhdw])\s*', str(value))
+    if not match:
+        raise ValueError(f"Invalid scrape frequency: {value!r}")
+    amount, unit = match.groups()
+    return timedelta(**{_UNITS[unit]: float(amount)})
+
+
+class ChannelRegistry:
+    def __init__(self, path='config/channels.yml'):
+        """Load the registry file"""
+        self.path = Path(path)
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+
+        defaults = {**DEFAULTS, **(config.get('defaults') or {})}
+        self.channels = {}
+        for entry in config.get('channels') or []:
+            if isinstance(entry, str):
+                entry = {'name': entry}
+            channel = {**defaults, **entry}
+            channel['frequency'] = parse_frequency(channel['frequency'])
+            self.channels[channel['name']] = channel
+
+    def names(self):
+        """Enabled channel names, highest priority first"""
+        enabled = [c for c in self.channels.values() if c['enabled']]
+        return [c['name'] for c in sorted(enabled, key=lambda c: -c['priority'])]
+
+    def get(self, name):
+        """Settings of one channel (registry defaults for unknown channels)"""
+        return self.channels.get(name, {**DEFAULTS, 'name': name, 'frequency': parse_frequency(DEFAULTS['frequency'])})
+
+    def next_due(self, name, checkpoints):
+        """When a channel should next be scraped (None = never scraped, due now)"""
+        last_success = checkpoints.get(name)['last_success_at']
+        if not last_success:
+            return None
+        return datetime.fromisoformat(last_success) + self.get(name)['frequency']
+
+    def due_channels(self, checkpoints, now=None):
+        """
+        Channels due for a scrape, most urgent first
+
+        Ordered by priority, then by how long the channel has been overdue
+        (never-scraped channels count as most overdue).
+        """
+        now = now or datetime.now()
+        due = []
+        for name in self.names():
+            next_due = self.next_due(name, checkpoints)
+            if next_due is None or next_due <= now:
+                overdue = (now - next_due).total_seconds() if next_due else float('inf')
+                due.append((-self.channels[name]['priority'], -overdue, name))
+        return [name for _, _, name in sorted(due)]
+
+    def seconds_until_next_due(self, checkpoints, now=None):
+        """Seconds until the earliest channel becomes due (0 if one is due already)"""
+        now = now or datetime.now()
+        waits = []
+        for name in self.names():
+            next_due = self.next_due(name, checkpoints)
+            waits.append(0 if next_due is None else max(0, (next_due - now).total_seconds()))
+        return min(waits) if waits else None
@@ -0,0 +1,99 @@
+"""
+Per-channel scrape checkpoints stored in a local SQLite database
+Tracks the newest message_id (high-water mark) and the oldest backfilled message_id
+"""
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+
+class CheckpointStore:
+    def __init__(self, db_path='data/state/scraper_state.db'):
+        """Open (or create) the checkpoint database"""
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(db_path)
+        self.connection = sqlite3.connect(self.db_path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.create_tables()
+
+    def create_tables(self):
+        """Create the checkpoint table if it does not exist"""
+        self.connection.execute("""
+        CREATE TABLE IF NOT EXISTS channel_checkpoints (
+            channel_name TEXT PRIMARY KEY,
+            last_message_id INTEGER DEFAULT 0,
+            oldest_message_id INTEGER,
+            backfill_complete INTEGER DEFAULT 0,
+            last_success_at TEXT,
+            updated_at TEXT
+        );
+        """)
+        self.connection.commit()
+
+    def get(self, channel_name):
+        """Return the checkpoint row for a channel as a dict (empty defaults if unknown)"""
+        row = self.connection.execute(
+            "SELECT * FROM channel_checkpoints WHERE channel_name = ?;", (channel_name,)
+        ).fetchone()
+
+        if row is None:
+            return {
+                'channel_name': channel_name,
+                'last_message_id': 0,
+                'oldest_message_id': None,
+                'backfill_complete': 0,
+                'last_success_at': None,
+                'updated_at': None
+            }
+        return dict(row)
+
+    def _ensure_row(self, channel_name):
+        self.connection.execute(
+            "INSERT OR IGNORE INTO channel_checkpoints (channel_name) VALUES (?);", (channel_name,)
+        )
+
+    def update_latest(self, channel_name, message_ids):
+        """Advance the high-water mark and widen the oldest id with newly scraped ids"""
+        if not message_ids:
+            return
+        now = datetime.now().isoformat()
+        self._ensure_row(channel_name)
+        self.connection.execute("""
+        UPDATE channel_checkpoints
+        SET last_message_id = MAX(COALESCE(last_message_id, 0), ?),
+            oldest_message_id = MIN(COALESCE(oldest_message_id, ?), ?),
+            updated_at = ?
+        WHERE channel_name = ?;
+        """, (max(message_ids), min(message_ids), min(message_ids), now, channel_name))
+        self.connection.commit()
+
+    def update_oldest(self, channel_name, oldest_message_id, complete=False):
+        """Record how far back a backfill has reached"""
+        now = datetime.now().isoformat()
+        self._ensure_row(channel_name)
+        self.connection.execute("""
+        UPDATE channel_checkpoints
+        SET oldest_message_id = MIN(COALESCE(oldest_message_id, ?), ?),
+            backfill_complete = MAX(backfill_complete, ?),
+            updated_at = ?
+        WHERE channel_name = ?;
+        """, (oldest_message_id, oldest_message_id, int(complete), now, channel_name))
+        self.connection.commit()
+
+    def mark_success(self, channel_name):
+        """Record the time of the last successful scrape"""
+        now = datetime.now().isoformat()
+        self._ensure_row(channel_name)
+        self.connection.execute(
+            "UPDATE channel_checkpoints SET last_success_at = ?, updated_at = ? WHERE channel_name = ?;",
+            (now, now, channel_name)
+        )
+        self.connection.commit()
+
+    def reset(self, channel_name):
+        """Forget everything about a channel"""
+        self.connection.execute("DELETE FROM channel_checkpoints WHERE channel_name = ?;", (channel_name,))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
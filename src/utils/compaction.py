@@ -0,0 +1,215 @@
+"""
+Compaction of the raw message lake into per-channel segments
+Daily snapshot files overlap heavily (the same messages are scraped again
+with newer view counts), so all files of a channel are merged by message_id,
+keeping the most recently scraped version, and rewritten as sorted JSONL
+segments. A JSON manifest lists every segment with its row count, message id
+and date ranges and checksum, so readers pick files without opening them.
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.utils.raw_io import (JsonlWriter, default_compression, find_raw_files, iter_messages, iter_records,
+                              raw_stem, raw_suffix)
+
+RAW_ROOT = 'data/raw/telegram_messages'
+COMPACTED_ROOT = 'data/raw/compacted/telegram_messages'
+
+# {channel}.jsonl, {channel}_backfill.jsonl, {channel}_range_{lo}-{hi}.jsonl (plus .gz/.zst)
+_RAW_NAME = re.compile(r'^(?P<channel>.+?)(?:_backfill|_range_\d+-\d+)?$')
+
+
+def channel_of(raw_file):
+    """Channel a raw file belongs to, from its file name"""
+    return _RAW_NAME.match(raw_stem(raw_file)).group('channel')
+
+
+def file_checksum(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LakeManifest:
+    def __init__(self, root=COMPACTED_ROOT):
+        """Load (or start) the manifest of a compacted lake"""
+        self.root = Path(root)
+        self.path = self.root / 'manifest.json'
+
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        else:
+            data = {}
+        self.segments = data.get('segments', [])
+        self.sources = data.get('sources', {})
+        self.updated_at = data.get('updated_at')
+
+    def save(self):
+        """Write the manifest atomically"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.updated_at = datetime.now().isoformat()
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': self.updated_at, 'segments': self.segments, 'sources': self.sources},
+                      f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def channels(self):
+        return sorted({s['channel_name'] for s in self.segments})
+
+    def select(self, channel_name=None, min_message_id=None, max_message_id=None, since=None, until=None):
+        """
+        Segments overlapping the given ranges
+
+        Args:
+            channel_name: Only segments of this channel
+            min_message_id / max_message_id: Message id range (inclusive)
+            since / until: ISO dates or timestamps bounding message_date (inclusive)
+
+        Returns:
+            List of segment entries (dicts with file, rows, ranges and sha256)
+        """
+        selected = []
+        for segment in self.segments:
+            if channel_name is not None and segment['channel_name'] != channel_name:
+                continue
+            if min_message_id is not None and segment['max_message_id'] < min_message_id:
+                continue
+            if max_message_id is not None and segment['min_message_id'] > max_message_id:
+                continue
+            if since is not None and segment['max_date'] and segment['max_date'][:len(since)] < since:
+                continue
+            if until is not None and segment['min_date'] and segment['min_date'][:len(until)] > until:
+                continue
+            selected.append(segment)
+        return selected
+
+    def source_changed(self, raw_file):
+        """True if a raw file is new or changed since it was last compacted"""
+        stat = Path(raw_file).stat()
+        known = self.sources.get(str(raw_file))
+        return known is None or known['size'] != stat.st_size or known['mtime'] != stat.st_mtime
+
+    def record_source(self, raw_file):
+        stat = Path(raw_file).stat()
+        self.sources[str(raw_file)] = {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def _newer(candidate, current):
+    """Whether candidate is a later scrape of the same message than current"""
+    return (candidate.scraped_at or 0) >= (current.scraped_at or 0)
+
+
+def compact_channel(channel_name, raw_files, manifest, segment_size=10000):
+    """
+    Merge a channel's existing segments and raw files into fresh segments
+
+    Returns:
+        Number of messages in the channel after compaction
+    """
+    # Compact TelegramMessage records, not dicts: a channel's full history is held here
+    merged = {}
+
+    def merge(messages):
+        for message in messages:
+            if message.message_id is None:
+                continue
+            current = merged.get(message.message_id)
+            if current is None or _newer(message, current):
+                merged[message.message_id] = message
+
+    old_segments = manifest.select(channel_name=channel_name)
+    for segment in old_segments:
+        merge(iter_records(manifest.root / segment['file']))
+    for raw_file in raw_files:
+        merge(iter_records(raw_file))
+
+    channel_dir = manifest.root / channel_name
+    channel_dir.mkdir(parents=True, exist_ok=True)
+    compression = default_compression()
+
+    new_segments = []
+    ids = sorted(merged)
+    for start in range(0, len(ids), segment_size):
+        chunk = ids[start:start + segment_size]
+        name = f"{channel_name}_{chunk[0]}-{chunk[-1]}{raw_suffix(compression)}"
+        tmp_path = channel_dir / f"{name}.tmp"
+        tmp_path.unlink(missing_ok=True)
+
+        dates = []
+        with JsonlWriter(tmp_path, fsync_every=0, compression=compression) as writer:
+            for message_id in chunk:
+                message = merged[message_id]
+                writer.write(message)
+                if message.message_date is not None:
+                    dates.append(message.message_date)
+        os.replace(tmp_path, channel_dir / name)
+
+        new_segments.append({
+            'file': f"{channel_name}/{name}",
+            'channel_name': channel_name,
+            'rows': len(chunk),
+            'min_message_id': chunk[0],
+            'max_message_id': chunk[-1],
+            'min_date': datetime.fromtimestamp(min(dates), tz=timezone.utc).isoformat() if dates else None,
+            'max_date': datetime.fromtimestamp(max(dates), tz=timezone.utc).isoformat() if dates else None,
+            'sha256': file_checksum(channel_dir / name)
+        })
+
+    # Swap the channel's entries, then drop segment files no longer referenced
+    manifest.segments = [s for s in manifest.segments if s['channel_name'] != channel_name] + new_segments
+    for raw_file in raw_files:
+        manifest.record_source(raw_file)
+    manifest.save()
+
+    kept = {s['file'] for s in new_segments}
+    for segment in old_segments:
+        if segment['file'] not in kept:
+            (manifest.root / segment['file']).unlink(missing_ok=True)
+
+    return len(merged)
+
+
+def compact_lake(raw_root=RAW_ROOT, root=COMPACTED_ROOT, segment_size=10000, force=False):
+    """
+    Compact every channel with new or changed raw files
+
+    Returns:
+        Dict mapping each compacted channel to its message count
+    """
+    manifest = LakeManifest(root)
+
+    by_channel = {}
+    for folder in sorted(d for d in Path(raw_root).iterdir() if d.is_dir()):
+        for raw_file in find_raw_files(folder):
+            by_channel.setdefault(channel_of(raw_file), []).append(raw_file)
+
+    compacted = {}
+    for channel_name, raw_files in sorted(by_channel.items()):
+        if not force and not any(manifest.source_changed(f) for f in raw_files):
+            continue
+        # Raw files already merged are covered by the existing segments
+        pending = raw_files if force else [f for f in raw_files if manifest.source_changed(f)]
+        compacted[channel_name] = compact_channel(channel_name, pending, manifest, segment_size=segment_size)
+
+    return compacted
+
+
+def iter_compacted_messages(root=COMPACTED_ROOT, **filters):
+    """
+    Yield messages from the segments matching LakeManifest.select filters
+
+    Only segments whose ranges overlap the filters are opened; messages are
+    not filtered individually.
+    """
+    manifest = LakeManifest(root)
+    for segment in manifest.select(**filters):
+        yield from iter_messages(manifest.root / segment['file'])
@@ -0,0 +1,75 @@
+"""
+Bounded async download queue drained by a pool of worker tasks
+Lets message iteration continue while images download in the background
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadPool:
+    def __init__(self, download, workers=4, queue_size=32, on_done=None):
+        """
+        Initialize the pool
+
+        Args:
+            download: Coroutine function returning the saved image path (or None),
+                      or a list of paths for a multi-image post
+            workers: Number of concurrent download tasks
+            queue_size: Pending downloads allowed before submit() blocks
+            on_done: Optional callback receiving each record once its download finished
+        """
+        self.download = download
+        self.on_done = on_done
+        self.workers = max(1, workers)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.tasks = []
+        self.completed = 0
+        self.failed = 0
+
+    async def __aenter__(self):
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Drain outstanding downloads on a clean exit, drop them on an error
+        if exc_type is None:
+            await self.queue.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        return False
+
+    async def submit(self, message_info, *args, download=None):
+        """
+        Queue a download; its path is set as message_info.image_path when done
+
+        A download returning a list (an album) also sets message_info.image_paths.
+        download overrides the pool's download function for this item.
+        """
+        await self.queue.put((message_info, args, download or self.download))
+
+    async def _worker(self):
+        while True:
+            message_info, args, download = await self.queue.get()
+            try:
+                result = await download(*args)
+                if isinstance(result, list):
+                    message_info.image_paths = result
+                    result = result[0] if result else None
+                if result:
+                    message_info.image_path = result
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            except Exception as e:
+                logger.error(f"Download failed for message {message_info.message_id}: {e}")
+                self.failed += 1
+            finally:
+                if self.on_done is not None:
+                    try:
+                        self.on_done(message_info)
+                    except Exception as e:
+                        logger.error(f"Failed to hand off message {message_info.message_id}: {e}")
+                self.queue.task_done()
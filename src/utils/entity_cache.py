@@ -0,0 +1,76 @@
+"""
+Persistent cache of resolved channel entities (username -> id / access_hash)
+Saves a get_entity round-trip, and its strict resolve-username flood limit,
+for every channel that was resolved recently. access_hash values are only
+valid for the account that resolved them, so entries are keyed by session.
+"""
+import sqlite3
+import time
+from pathlib import Path
+
+
+class EntityCache:
+    def __init__(self, db_path='data/state/scraper_state.db', ttl_hours=168):
+        """
+        Open (or create) the cache
+
+        Args:
+            db_path: SQLite file (shared with the checkpoint store by default)
+            ttl_hours: Age after which an entry is resolved again over the network
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(db_path), timeout=30)
+        self.ttl_seconds = ttl_hours * 3600
+        self.hits = 0
+        self.misses = 0
+        self.create_tables()
+
+    def create_tables(self):
+        """Create the cache table if it does not exist"""
+        self.connection.execute("""
+        CREATE TABLE IF NOT EXISTS entity_cache (
+            session_name TEXT NOT NULL,
+            username TEXT NOT NULL,
+            channel_id INTEGER NOT NULL,
+            access_hash INTEGER NOT NULL,
+            title TEXT,
+            resolved_at REAL NOT NULL,
+            PRIMARY KEY (session_name, username)
+        );
+        """)
+        self.connection.commit()
+
+    def get(self, session_name, username):
+        """Return a fresh entry as a dict, or None when missing or stale"""
+        row = self.connection.execute("""
+        SELECT channel_id, access_hash, title, resolved_at FROM entity_cache
+        WHERE session_name = ? AND username = ?;
+        """, (session_name, username.lower())).fetchone()
+
+        if row is None or time.time() - row[3] > self.ttl_seconds:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {'channel_id': row[0], 'access_hash': row[1], 'title': row[2]}
+
+    def put(self, session_name, username, entity):
+        """Remember a resolved entity (anything with id and access_hash)"""
+        self.connection.execute("""
+        INSERT OR REPLACE INTO entity_cache
+        (session_name, username, channel_id, access_hash, title, resolved_at)
+        VALUES (?, ?, ?, ?, ?, ?);
+        """, (session_name, username.lower(), entity.id, entity.access_hash,
+              getattr(entity, 'title', None), time.time()))
+        self.connection.commit()
+
+    def invalidate(self, session_name, username):
+        """Drop an entry, e.g. after the cached access_hash was rejected"""
+        self.connection.execute(
+            "DELETE FROM entity_cache WHERE session_name = ? AND username = ?;",
+            (session_name, username.lower())
+        )
+        self.connection.commit()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
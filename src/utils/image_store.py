@@ -0,0 +1,186 @@
+"""
+Content-addressed image store
+Images are saved once per SHA-256 under data/raw/images/blobs/ and an SQLite
+index maps Telegram photo ids and (channel, message_id) pairs to those hashes.
+Album members also record the id of the post (raw row) they belong to.
+Each blob records which Telegram size variant it is ('full' = largest size),
+so images downloaded size-capped can be upgraded later.
+"""
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+
+class ImageStore:
+    def __init__(self, root='data/raw/images'):
+        """Open (or create) the store rooted at the image directory"""
+        self.root = Path(root)
+        self.blob_dir = self.root / 'blobs'
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+        self.connection = sqlite3.connect(str(self.root / 'index.db'), timeout=30)
+        self.create_tables()
+
+    def create_tables(self):
+        """Create the index tables if they do not exist"""
+        self.connection.executescript("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size_bytes INTEGER,
+            created_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS photos (
+            photo_id INTEGER PRIMARY KEY,
+            sha256 TEXT NOT NULL REFERENCES blobs(sha256)
+        );
+        CREATE TABLE IF NOT EXISTS message_images (
+            channel_name TEXT NOT NULL,
+            message_id INTEGER NOT NULL,
+            sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+            photo_id INTEGER,
+            PRIMARY KEY (channel_name, message_id)
+        );
+        """)
+
+        # Indexes created before size-capped downloads hold only full-size blobs
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(blobs);")}
+        if 'variant' not in columns:
+            self.connection.execute("ALTER TABLE blobs ADD COLUMN variant TEXT NOT NULL DEFAULT 'full';")
+
+        # Album members point at their post; NULL means the message is its own post
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(message_images);")}
+        if 'post_id' not in columns:
+            self.connection.execute("ALTER TABLE message_images ADD COLUMN post_id INTEGER;")
+        self.connection.commit()
+
+    def blob_path(self, sha256):
+        """Location of a blob: blobs/ab/abcdef....jpg"""
+        return self.blob_dir / sha256[:2] / f"{sha256}.jpg"
+
+    def lookup(self, channel_name, message_id, photo_id=None, post_id=None):
+        """
+        Return the stored image path for a message without downloading
+
+        Checks the message itself first, then the Telegram photo id (the same
+        photo reposted in another message or channel). A photo hit is linked
+        to the message (and post_id) so later lookups are direct.
+        """
+        row = self.connection.execute(
+            "SELECT sha256 FROM message_images WHERE channel_name = ? AND message_id = ?;",
+            (channel_name, message_id)
+        ).fetchone()
+
+        if row is None and photo_id is not None:
+            row = self.connection.execute(
+                "SELECT sha256 FROM photos WHERE photo_id = ?;", (photo_id,)
+            ).fetchone()
+            if row is not None:
+                self._link(channel_name, message_id, row[0], photo_id, post_id)
+
+        if row is None:
+            return None
+
+        path = self.blob_path(row[0])
+        return str(path) if path.exists() else None
+
+    def put(self, data, channel_name, message_id, photo_id=None, variant='full', post_id=None):
+        """
+        Store image bytes (once per hash) and index them; returns the blob path
+
+        Args:
+            variant: Telegram size type of the bytes ('full' for the largest size)
+            post_id: Id of the album post the message belongs to
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(sha256)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see partial images
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        self.connection.execute(
+            "INSERT OR IGNORE INTO blobs (sha256, path, size_bytes, created_at, variant) VALUES (?, ?, ?, ?, ?);",
+            (sha256, str(path), len(data), datetime.now().isoformat(), variant)
+        )
+        if photo_id is not None:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO photos (photo_id, sha256) VALUES (?, ?);", (photo_id, sha256)
+            )
+        self._link(channel_name, message_id, sha256, photo_id, post_id)
+        return str(path)
+
+    def _link(self, channel_name, message_id, sha256, photo_id, post_id=None):
+        # Relinking (e.g. an upgraded original) keeps a known post_id
+        self.connection.execute(
+            "INSERT INTO message_images (channel_name, message_id, sha256, photo_id, post_id) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (channel_name, message_id) DO UPDATE SET sha256 = excluded.sha256, "
+            "photo_id = excluded.photo_id, post_id = COALESCE(excluded.post_id, message_images.post_id);",
+            (channel_name, message_id, sha256, photo_id, post_id)
+        )
+        self.connection.commit()
+
+    def pending_originals(self, channels=None):
+        """
+        Messages whose stored image is a size-capped variant
+
+        Returns:
+            Dict mapping channel name to a list of message ids
+        """
+        rows = self.connection.execute("""
+        SELECT m.channel_name, m.message_id
+        FROM message_images m
+        JOIN blobs b ON b.sha256 = m.sha256
+        WHERE b.variant != 'full'
+        ORDER BY m.channel_name, m.message_id;
+        """).fetchall()
+
+        pending = {}
+        for channel_name, message_id in rows:
+            if channels is None or channel_name in channels:
+                pending.setdefault(channel_name, []).append(message_id)
+        return pending
+
+    def iter_unique_images(self):
+        """
+        Yield (path, [(channel_name, message_id), ...]) once per stored image
+
+        Album members are reported under their post's id, the one stored in
+        raw.telegram_messages.
+        """
+        rows = self.connection.execute("""
+        SELECT DISTINCT b.sha256, b.path, m.channel_name, COALESCE(m.post_id, m.message_id) AS message_id
+        FROM blobs b
+        JOIN message_images m ON m.sha256 = b.sha256
+        ORDER BY b.sha256, m.channel_name, message_id;
+        """).fetchall()
+
+        current, path, messages = None, None, []
+        for sha256, blob_path, channel_name, message_id in rows:
+            if sha256 != current:
+                if current is not None:
+                    yield path, messages
+                current, path, messages = sha256, blob_path, []
+            messages.append((channel_name, message_id))
+        if current is not None:
+            yield path, messages
+
+    def stats(self):
+        """Blob count, indexed message count and bytes on disk"""
+        blobs, size = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM blobs;"
+        ).fetchone()
+        messages = self.connection.execute("SELECT COUNT(*) FROM message_images;").fetchone()[0]
+        capped = self.connection.execute("SELECT COUNT(*) FROM blobs WHERE variant != 'full';").fetchone()[0]
+        return {'unique_images': blobs, 'indexed_messages': messages, 'bytes_stored': size,
+                'size_capped_images': capped}
+
+    def close(self):
+        self.connection.close()
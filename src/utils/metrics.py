@@ -0,0 +1,219 @@
+"""
+Scraper instrumentation: counters, latency histograms and per-channel timings
+Exported as a JSON run summary or in the Prometheus text format
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Latency buckets in seconds (Prometheus-style upper bounds)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        """Approximate quantile: upper bound of the bucket containing it"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= target:
+                return bound
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'avg_seconds': round(self.sum / self.count, 4) if self.count else 0.0,
+            'p50_seconds': self.quantile(0.5),
+            'p95_seconds': self.quantile(0.95),
+            'max_seconds': round(self.max, 4)
+        }
+
+
+class ScraperMetrics:
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+
+        self.messages = {}
+        self.images = {}
+        self.image_bytes = {}
+        self.images_deduplicated = 0
+        self.entity_cache_hits = 0
+        self.channel_runs = {}
+
+        self.latency = {
+            'get_entity': Histogram(),
+            'download_media': Histogram(),
+            'get_messages': Histogram()
+        }
+
+        # Held while recording and while exporting: serve() reads from its own thread
+        self._lock = threading.Lock()
+
+    def record_message(self, channel_name, count=1):
+        with self._lock:
+            self.messages[channel_name] = self.messages.get(channel_name, 0) + count
+
+    def record_image(self, channel_name, size_bytes):
+        """A downloaded image and the bytes transferred"""
+        with self._lock:
+            self.images[channel_name] = self.images.get(channel_name, 0) + 1
+            self.image_bytes[channel_name] = self.image_bytes.get(channel_name, 0) + size_bytes
+
+    def observe(self, operation, seconds):
+        """Latency of one API call (get_entity, download_media, get_messages)"""
+        with self._lock:
+            self.latency.setdefault(operation, Histogram()).observe(seconds)
+
+    def record_channel(self, channel_name, seconds, messages, status):
+        """Outcome and wall-clock duration of one channel scrape"""
+        with self._lock:
+            self.channel_runs[channel_name] = {
+                'seconds': round(seconds, 3),
+                'messages': messages,
+                'status': status
+            }
+
+    def summary(self, limiters=None):
+        """
+        Run summary as a dict
+
+        Args:
+            limiters: Optional {session name: AdaptiveRateLimiter} for throttle totals
+        """
+        with self._lock:
+            return self._summary(limiters)
+
+    def _summary(self, limiters):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        total_messages = sum(self.messages.values())
+        total_bytes = sum(self.image_bytes.values())
+        limiter_metrics = {name: limiter.metrics() for name, limiter in (limiters or {}).items()}
+
+        return {
+            'started_at': self.started_at.isoformat(),
+            'elapsed_seconds': round(elapsed, 3),
+            'messages': total_messages,
+            'messages_per_second': round(total_messages / elapsed, 3),
+            'images': sum(self.images.values()),
+            'images_deduplicated': self.images_deduplicated,
+            'image_bytes': total_bytes,
+            'image_bytes_per_second': round(total_bytes / elapsed, 1),
+            'entity_cache_hits': self.entity_cache_hits,
+            'flood_wait_seconds': sum(m['flood_wait_seconds'] for m in limiter_metrics.values()),
+            'throttle_events': sum(m['throttle_events'] for m in limiter_metrics.values()),
+            'latency': {name: histogram.summary() for name, histogram in self.latency.items()},
+            'channels': {
+                name: {
+                    **run,
+                    'images': self.images.get(name, 0),
+                    'image_bytes': self.image_bytes.get(name, 0)
+                }
+                for name, run in self.channel_runs.items()
+            },
+            'rate_limiters': limiter_metrics
+        }
+
+    def write_summary(self, path, limiters=None):
+        """Write the run summary as JSON; returns the path"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(limiters), f, indent=2)
+        return str(path)
+
+    def to_prometheus(self, limiters=None):
+        """Metrics in the Prometheus text exposition format"""
+        with self._lock:
+            return self._prometheus(limiters)
+
+    def _prometheus(self, limiters):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        metric('scraper_messages_total', 'counter', 'Messages scraped',
+               [({'channel': c}, n) for c, n in self.messages.items()])
+        metric('scraper_images_total', 'counter', 'Images downloaded',
+               [({'channel': c}, n) for c, n in self.images.items()])
+        metric('scraper_image_bytes_total', 'counter', 'Image bytes downloaded',
+               [({'channel': c}, n) for c, n in self.image_bytes.items()])
+        metric('scraper_images_deduplicated_total', 'counter', 'Image downloads skipped by the image store',
+               [({}, self.images_deduplicated)])
+        metric('scraper_entity_cache_hits_total', 'counter', 'Channels resolved from the entity cache',
+               [({}, self.entity_cache_hits)])
+        metric('scraper_channel_duration_seconds', 'gauge', 'Wall-clock time of the last scrape per channel',
+               [({'channel': c}, run['seconds']) for c, run in self.channel_runs.items()])
+
+        lines.append("# HELP scraper_api_latency_seconds Telegram API call latency")
+        lines.append("# TYPE scraper_api_latency_seconds histogram")
+        for operation, histogram in self.latency.items():
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'scraper_api_latency_seconds_bucket{{operation="{operation}",le="{bound}"}} {count}')
+            lines.append(f'scraper_api_latency_seconds_bucket{{operation="{operation}",le="+Inf"}} {histogram.count}')
+            lines.append(f'scraper_api_latency_seconds_sum{{operation="{operation}"}} {histogram.sum}')
+            lines.append(f'scraper_api_latency_seconds_count{{operation="{operation}"}} {histogram.count}')
+
+        limiter_metrics = {name: limiter.metrics() for name, limiter in (limiters or {}).items()}
+        metric('scraper_rate_limit_per_second', 'gauge', 'Current adaptive request rate',
+               [({'session': s}, m['rate_per_second']) for s, m in limiter_metrics.items()])
+        metric('scraper_throttle_events_total', 'counter', 'FloodWaitError occurrences',
+               [({'session': s}, m['throttle_events']) for s, m in limiter_metrics.items()])
+        metric('scraper_flood_wait_seconds_total', 'counter', 'Seconds spent in flood waits',
+               [({'session': s}, m['flood_wait_seconds']) for s, m in limiter_metrics.items()])
+
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, limiters=None):
+        """
+        Serve /metrics in the Prometheus format from a daemon thread
+
+        Args:
+            port: TCP port to listen on
+            limiters: Callable returning {session name: limiter}, evaluated per request
+        """
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus(limiters() if limiters else None).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -0,0 +1,82 @@
+"""
+Micro-batching for streamed records
+Items are buffered and handed to a flush callback when the batch is full or
+the oldest buffered item has waited max_delay seconds, whichever comes first.
+A batch whose flush fails stays buffered and is retried with the next flush.
+"""
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    def __init__(self, flush, max_size=100, max_delay=2.0):
+        """
+        Initialize the batcher
+
+        Args:
+            flush: Callable receiving a list of items; coroutine functions are
+                   awaited, plain callables run in the default executor so
+                   blocking I/O never stalls the event loop
+            max_size: Items per batch before an immediate flush
+            max_delay: Seconds an item may wait before its batch is flushed
+        """
+        self.flush_callback = flush
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.batches = 0
+        self.items = 0
+        self._buffer = []
+        self._first_added = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def pending(self):
+        """Number of buffered items not flushed yet"""
+        return len(self._buffer)
+
+    async def add(self, item):
+        """Buffer one item, flushing if the batch is full"""
+        async with self._lock:
+            if not self._buffer:
+                self._first_added = time.monotonic()
+            self._buffer.append(item)
+            if len(self._buffer) >= self.max_size:
+                await self._flush_locked()
+
+    async def flush(self):
+        """
+        Flush whatever is buffered
+
+        Returns:
+            True if the buffer is empty afterwards, False if the flush failed
+        """
+        async with self._lock:
+            return await self._flush_locked()
+
+    async def _flush_locked(self):
+        if not self._buffer:
+            return True
+        batch = list(self._buffer)
+        try:
+            if asyncio.iscoroutinefunction(self.flush_callback):
+                await self.flush_callback(batch)
+            else:
+                await asyncio.get_running_loop().run_in_executor(None, self.flush_callback, batch)
+        except Exception as e:
+            # The batch stays buffered and is retried by the next flush
+            logger.error(f"Failed to flush batch of {len(batch)} items, will retry: {e}")
+            return False
+        self._buffer, self._first_added = [], None
+        self.batches += 1
+        self.items += len(batch)
+        return True
+
+    async def run(self):
+        """Background task flushing batches that reached max_delay"""
+        while True:
+            await asyncio.sleep(self.max_delay / 4)
+            if self._first_added is not None and time.monotonic() - self._first_added >= self.max_delay:
+                await self.flush()
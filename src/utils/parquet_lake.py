@@ -0,0 +1,147 @@
+"""
+Columnar copy of the raw message lake
+Raw JSONL files are mirrored as Parquet under
+data/raw/parquet/telegram_messages/date=YYYY-MM-DD/channel=NAME/, one file per
+raw file, with a fixed schema. Readers can then load only the columns and
+partitions they need.
+"""
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.models.message import TelegramMessage
+from src.utils.raw_io import find_raw_files, iter_messages, iter_records, raw_stem
+
+PARQUET_ROOT = 'data/raw/parquet/telegram_messages'
+
+MESSAGE_SCHEMA = pa.schema([
+    ('message_id', pa.int64()),
+    ('channel_name', pa.string()),
+    ('message_date', pa.timestamp('us', tz='UTC')),
+    ('message_text', pa.string()),
+    ('has_media', pa.bool_()),
+    ('image_path', pa.string()),
+    ('image_paths', pa.list_(pa.string())),
+    ('grouped_id', pa.int64()),
+    ('album_message_ids', pa.list_(pa.int64())),
+    ('views', pa.int64()),
+    ('forwards', pa.int64()),
+    ('scraped_at', pa.timestamp('us'))
+])
+
+
+def to_row(message):
+    """Coerce a TelegramMessage (or raw dict) to the fixed Parquet schema"""
+    if isinstance(message, dict):
+        message = TelegramMessage.from_dict(message)
+    return {
+        'message_id': message.message_id,
+        'channel_name': message.channel_name,
+        'message_date': message.message_datetime,
+        'message_text': message.message_text,
+        'has_media': message.has_media,
+        'image_path': message.image_path,
+        'image_paths': message.image_paths,
+        'grouped_id': message.grouped_id,
+        'album_message_ids': message.album_message_ids,
+        'views': message.views,
+        'forwards': message.forwards,
+        'scraped_at': datetime.fromtimestamp(message.scraped_at) if message.scraped_at is not None else None
+    }
+
+
+def partition_dir(root, date, channel_name):
+    """Hive-style partition directory of one day and channel"""
+    return Path(root) / f"date={date}" / f"channel={channel_name}"
+
+
+def write_parquet(messages, path, row_group_size=50000):
+    """
+    Stream message dicts into a Parquet file in row groups
+
+    The file is written next to its final location and renamed at the end,
+    so readers never see a partial file.
+
+    Returns:
+        Number of rows written
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.parquet.tmp')
+
+    rows = 0
+    batch = []
+    with pq.ParquetWriter(tmp_path, MESSAGE_SCHEMA, compression='zstd') as writer:
+        for message in messages:
+            batch.append(to_row(message))
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=MESSAGE_SCHEMA))
+                rows += len(batch)
+                batch = []
+        if batch or not rows:
+            writer.write_table(pa.Table.from_pylist(batch, schema=MESSAGE_SCHEMA))
+            rows += len(batch)
+
+    tmp_path.replace(path)
+    return rows
+
+
+def export_folder(data_folder, root=PARQUET_ROOT, force=False):
+    """
+    Mirror one raw date folder as Parquet partitions
+
+    All raw files of one stem ({channel}[_{suffix}] as .json, .jsonl,
+    .jsonl.gz or .jsonl.zst - e.g. when RAW_COMPRESSION is switched on
+    mid-day) become a single date={folder}/channel={channel}/{stem}.parquet.
+    Targets newer than all of their raw files are skipped unless force is set.
+
+    Returns:
+        Dict mapping written Parquet paths to row counts
+    """
+    data_folder = Path(data_folder)
+    written = {}
+
+    by_stem = {}
+    for raw_file in find_raw_files(data_folder):
+        by_stem.setdefault(raw_stem(raw_file), []).append(raw_file)
+
+    for stem, raw_files in by_stem.items():
+        first = next((m for raw_file in raw_files for m in iter_messages(raw_file)), None)
+        if first is None:
+            continue
+        channel_name = first.get('channel_name') or stem
+
+        target = partition_dir(root, data_folder.name, channel_name) / f"{stem}.parquet"
+        newest = max(raw_file.stat().st_mtime for raw_file in raw_files)
+        if not force and target.exists() and target.stat().st_mtime >= newest:
+            continue
+
+        records = (record for raw_file in raw_files for record in iter_records(raw_file))
+        written[str(target)] = write_parquet(records, target)
+
+    return written
+
+
+def read_messages(root=PARQUET_ROOT, columns=None, dates=None, channels=None):
+    """
+    Read messages from the Parquet lake as a pyarrow Table
+
+    Args:
+        columns: Columns to read (None for all)
+        dates: Only these 'YYYY-MM-DD' partitions
+        channels: Only these channel partitions
+
+    Partition filters prune directories, so unrelated files are never opened.
+    """
+    dataset = ds.dataset(root, format='parquet', partitioning='hive')
+
+    expression = None
+    for field, values in (('date', dates), ('channel', channels)):
+        if values:
+            condition = ds.field(field).isin(list(values))
+            expression = condition if expression is None else expression & condition
+
+    return dataset.to_table(columns=columns, filter=expression)
@@ -0,0 +1,100 @@
+"""
+PostgreSQL COPY payloads for raw messages
+Messages are rendered in COPY's text format (tab-separated, \\N for NULL) into
+in-memory buffers that DataLoader streams into a staging table.
+"""
+import io
+from datetime import datetime, timezone
+
+from src.models.message import TelegramMessage
+from src.utils.raw_io import iter_records
+
+# Column order of the COPY payload and of the staging table
+STAGING_COLUMNS = (
+    'message_id', 'channel_name', 'message_date', 'message_text', 'has_media',
+    'image_path', 'views', 'forwards', 'grouped_id', 'image_paths', 'scraped_at'
+)
+
+def copy_value(value):
+    """One field in COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        value = array_literal(value)
+    # Chained replace is much faster than str.translate on non-ASCII (Amharic) text
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def array_literal(values):
+    """PostgreSQL array literal of strings: {"a","b"}"""
+    items = ('"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values)
+    return '{' + ','.join(items) + '}'
+
+
+def copy_row(message):
+    """A TelegramMessage (or raw dict) as one line of the COPY payload"""
+    if isinstance(message, dict):
+        message = TelegramMessage.from_dict(message)
+
+    message_date = message.message_datetime
+    # Stored as UTC, the clock the loader's metrics_updated_at uses as well
+    scraped_at = (datetime.fromtimestamp(message.scraped_at, tz=timezone.utc).replace(tzinfo=None)
+                  if message.scraped_at is not None else None)
+    image_paths = message.image_paths
+    if image_paths is None and message.image_path:
+        image_paths = [message.image_path]
+
+    return '\t'.join(copy_value(v) for v in (
+        message.message_id,
+        message.channel_name,
+        message_date.strftime('%Y-%m-%d %H:%M:%S') if message_date else None,
+        message.message_text,
+        message.has_media,
+        message.image_path,
+        message.views,
+        message.forwards,
+        message.grouped_id,
+        image_paths,
+        scraped_at.isoformat(sep=' ') if scraped_at else None
+    )) + '\n'
+
+
+def copy_chunks(messages, chunk_rows=50000):
+    """
+    Render messages into COPY buffers of up to chunk_rows rows
+
+    Yields:
+        (buffer, rows) with the buffer rewound and ready for copy_expert
+    """
+    buffer = io.StringIO()
+    rows = 0
+    for message in messages:
+        if isinstance(message, dict):
+            message = TelegramMessage.from_dict(message)
+        if message.message_id is None:
+            continue
+        buffer.write(copy_row(message))
+        rows += 1
+        if rows >= chunk_rows:
+            buffer.seek(0)
+            yield buffer, rows
+            buffer = io.StringIO()
+            rows = 0
+    if rows:
+        buffer.seek(0)
+        yield buffer, rows
+
+
+def render_file(raw_file, chunk_rows=50000):
+    """
+    COPY payloads of one raw file, for parsing in a worker process
+
+    Returns:
+        List of (payload text, rows) pairs; plain strings pickle cheaply
+    """
+    return [(buffer.getvalue(), rows) for buffer, rows in copy_chunks(iter_records(raw_file), chunk_rows)]
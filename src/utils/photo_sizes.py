@@ -0,0 +1,40 @@
+"""
+Choosing which Telegram photo size to download
+Telegram keeps every photo in a few server-side sizes (thumbnails up to the
+largest ~1280/2560 px variant); originals are never served. Downloading the
+smallest size that still covers the detector's input resolution saves most of
+the bytes of the largest one.
+"""
+
+# Size entries without dimensions (stripped previews, vector outlines) are never picked
+def sized_variants(photo):
+    """Photo sizes that have pixel dimensions, smallest first"""
+    sizes = [s for s in getattr(photo, 'sizes', None) or []
+             if getattr(s, 'w', None) and getattr(s, 'h', None)]
+    return sorted(sizes, key=lambda s: max(s.w, s.h))
+
+
+def pick_photo_size(photo, min_side):
+    """
+    Nearest size whose longest side is at least min_side pixels
+
+    Args:
+        photo: Telethon Photo
+        min_side: Required longest side in pixels (None or 0 = largest size)
+
+    Returns:
+        (size, variant): size is the PhotoSize to pass as download_media(thumb=...),
+        or None to let Telethon fetch the largest size; variant is the size type
+        (e.g. 'x') or 'full' when the largest size is used
+    """
+    sizes = sized_variants(photo)
+    if not min_side or not sizes:
+        return None, 'full'
+
+    for size in sizes:
+        if max(size.w, size.h) >= min_side:
+            if size is sizes[-1]:
+                break
+            return size, getattr(size, 'type', None) or f"{size.w}x{size.h}"
+
+    return None, 'full'
@@ -0,0 +1,144 @@
+"""
+Adaptive token-bucket rate limiter for Telegram API calls
+Learns from FloodWaitError and recovers after sustained success
+"""
+import asyncio
+import logging
+import time
+from telethon.errors import FloodWaitError
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=5.0, burst=10, min_rate=0.2, max_rate=30.0,
+                 backoff_factor=0.5, increase_step=0.5, recovery_after=50):
+        """
+        Initialize the limiter
+
+        Args:
+            rate: Starting number of requests per second
+            burst: Bucket capacity (requests allowed back-to-back)
+            min_rate: Lower bound the rate never drops below
+            max_rate: Upper bound the rate never grows above
+            backoff_factor: Multiplier applied to the rate on a flood wait
+            increase_step: Requests per second added after a run of successes
+            recovery_after: Consecutive successes needed before increasing the rate
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.backoff_factor = backoff_factor
+        self.increase_step = increase_step
+        self.recovery_after = recovery_after
+
+        # Highest rate known to be tolerated; lowered on every flood wait
+        self.ceiling = max_rate
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._successes = 0
+        self._lock = None
+        self._loop = None
+
+        # Counters exposed through metrics()
+        self.requests = 0
+        self.throttle_events = 0
+        self.flood_wait_seconds = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self, now):
+        """Add tokens for the time elapsed since the last refill"""
+        elapsed = now - self._last_refill
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def _get_lock(self):
+        """Lock bound to the running event loop (the limiter may outlive one asyncio.run)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    async def acquire(self, tokens=1):
+        """Wait until a request may be sent"""
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+
+                # A flood wait blocks every caller until it expires
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        self.requests += 1
+                        return
+                    delay = (tokens - self._tokens) / self.rate
+
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+
+    def record_success(self):
+        """Register a successful request; raise the rate after sustained success"""
+        self._successes += 1
+        if self._successes < self.recovery_after:
+            return
+
+        self._successes = 0
+        if self.rate < self.ceiling:
+            self.rate = min(self.ceiling, self.rate + self.increase_step)
+        elif self.ceiling < self.max_rate:
+            # Probe slowly above the last known limit
+            self.ceiling = min(self.max_rate, self.ceiling + self.increase_step)
+            self.rate = self.ceiling
+
+    def record_flood_wait(self, seconds):
+        """Register a FloodWaitError: pause all callers and lower the rate"""
+        self.throttle_events += 1
+        self.flood_wait_seconds += seconds
+        self._successes = 0
+
+        # Remember that the current rate was too fast
+        self.ceiling = max(self.min_rate, self.rate * 0.9)
+        self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+        logger.warning(f"Flood wait of {seconds}s, rate lowered to {self.rate:.2f} req/s")
+
+    async def call(self, func, *args, retries=3, **kwargs):
+        """
+        Rate-limit an awaitable API call, retrying after flood waits
+
+        Args:
+            func: Coroutine function to call
+            retries: Number of retries after a FloodWaitError
+        """
+        for attempt in range(retries + 1):
+            await self.acquire()
+            try:
+                result = await func(*args, **kwargs)
+            except FloodWaitError as e:
+                self.record_flood_wait(e.seconds)
+                if attempt == retries:
+                    raise
+                continue
+
+            self.record_success()
+            return result
+
+    def metrics(self):
+        """Current rate and throttle counters"""
+        return {
+            'rate_per_second': round(self.rate, 3),
+            'ceiling_per_second': round(self.ceiling, 3),
+            'requests': self.requests,
+            'throttle_events': self.throttle_events,
+            'flood_wait_seconds': self.flood_wait_seconds,
+            'waited_seconds': round(self.waited_seconds, 3)
+        }
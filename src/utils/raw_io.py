@@ -0,0 +1,241 @@
+"""
+Raw message files: streaming newline-delimited JSON writer and lazy readers
+Readers understand both the JSONL files and the older pretty-printed JSON arrays,
+plain or gzip/zstd-compressed (chosen by file suffix, decompressed as a stream).
+orjson is used for parsing and serialising when installed (RAW_JSON_PARSER=json
+forces the standard library); large JSON arrays are parsed incrementally.
+"""
+import gzip
+import io
+import json
+import os
+import re
+from pathlib import Path
+
+from src.models.message import TelegramMessage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None and os.getenv('RAW_JSON_PARSER', '').lower() != 'json':
+    json_loads = orjson.loads
+
+    def json_dumps(record):
+        return orjson.dumps(record).decode('utf-8')
+else:
+    json_loads = json.loads
+
+    def json_dumps(record):
+        return json.dumps(record, ensure_ascii=False)
+
+# Legacy JSON arrays above this size are parsed element by element
+ITERATIVE_THRESHOLD = 64 * 1024 * 1024
+
+_SEPARATOR = re.compile(r'[\s,]*')
+
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+RAW_SUFFIXES = tuple(
+    base + extra for base in ('.jsonl', '.json') for extra in ('', *COMPRESSION_SUFFIXES.values())
+)
+
+# zstd level trading a little ratio for fast appends from the scraper
+ZSTD_LEVEL = 9
+
+
+def default_compression():
+    """Compression for new raw files from RAW_COMPRESSION ('gzip', 'zstd' or unset)"""
+    value = os.getenv('RAW_COMPRESSION', '').lower()
+    return value if value in COMPRESSION_SUFFIXES else None
+
+
+def raw_suffix(compression=None):
+    """File suffix of JSONL files written with the given compression"""
+    return '.jsonl' + COMPRESSION_SUFFIXES.get(compression or '', '')
+
+
+def compression_of(path):
+    """Compression implied by a file name (None for plain files)"""
+    name = str(path)
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            return compression
+    return None
+
+
+def raw_stem(path):
+    """File name without its raw suffix: EAHCI_backfill.jsonl.zst -> EAHCI_backfill"""
+    name = Path(path).name
+    for suffix in sorted(RAW_SUFFIXES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return Path(path).stem
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd-compressed raw files need the 'zstandard' package (pip install zstandard)")
+    return zstandard
+
+
+def open_raw(path, mode='r', compression='auto'):
+    """
+    Open a raw file, (de)compressing as a stream
+
+    Args:
+        mode: 'r', 'w' or 'a' for UTF-8 text, 'rb' for bytes (cheaper for
+              parsers that take bytes); appends to compressed files add a new
+              gzip member / zstd frame, which readers read straight through
+        compression: 'gzip', 'zstd' or None; or 'auto' to detect it from the suffix
+    """
+    if compression == 'auto':
+        compression = compression_of(path)
+    binary = mode.endswith('b')
+    mode = mode.rstrip('b')
+
+    if compression == 'gzip':
+        if binary:
+            return gzip.open(path, mode + 'b')
+        return gzip.open(path, mode + 't', encoding='utf-8')
+
+    if compression == 'zstd':
+        zstandard = _zstandard()
+        raw = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+            if binary:
+                return io.BufferedReader(stream)
+        else:
+            stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+
+    if binary:
+        return open(path, mode + 'b')
+    return open(path, mode, encoding='utf-8')
+
+
+class JsonlWriter:
+    def __init__(self, path, fsync_every=500, compression='auto'):
+        """
+        Open a JSONL file for appending
+
+        Args:
+            path: Output file (parent directories are created)
+            fsync_every: Records between automatic flush + fsync (0 to only sync on checkpoint/close)
+            compression: 'gzip', 'zstd' or None; or 'auto' to detect it from the suffix
+        """
+        self.path = Path(path)
+        self.compression = compression_of(path) if compression == 'auto' else compression
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync_every = fsync_every
+        self.records = 0
+        self._unsynced = 0
+        # Opened on the first write so runs without new messages leave no empty file
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write(self, record):
+        """Append one record (a dict or TelegramMessage) as a single line"""
+        if isinstance(record, TelegramMessage):
+            record = record.to_dict()
+        if self._file is None:
+            self._file = open_raw(self.path, 'a', compression=self.compression)
+        self._file.write(json_dumps(record) + '\n')
+        self.records += 1
+        self._unsynced += 1
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Flush and fsync so everything written so far survives a crash"""
+        if self._file is None or self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self.checkpoint()
+            self._file.close()
+
+
+def iter_json_array(f, chunk_size=1 << 20):
+    """
+    Yield the objects of a top-level JSON array without reading the whole file
+
+    The stream is read in chunks and decoded one element at a time with the
+    standard library's raw_decode, so memory stays bounded by the largest
+    element. Elements must be objects or arrays (as raw messages are).
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError("Expected a JSON array")
+    pos = 1
+    eof = False
+
+    while True:
+        pos = _SEPARATOR.match(buffer, pos).end()
+        if buffer.startswith(']', pos):
+            return
+        try:
+            item, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Element spans the chunk boundary: keep the tail and read on
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+
+
+def iter_messages(path, loads=None, iterative=None):
+    """
+    Lazily yield message dicts from a raw file (.jsonl or .json, optionally .gz/.zst)
+
+    Args:
+        loads: JSON parser for whole documents/lines (defaults to orjson when available)
+        iterative: Parse JSON arrays element by element; by default only files
+                   larger than ITERATIVE_THRESHOLD are
+    """
+    path = Path(path)
+    loads = loads or json_loads
+    # Bytes go to the parser as they are; both orjson and json.loads accept UTF-8
+    with open_raw(path, 'rb') as f:
+        if path.name[len(raw_stem(path)):].startswith('.jsonl'):
+            for line in f:
+                if not line.isspace():
+                    yield loads(line)
+        else:
+            if iterative is None:
+                iterative = path.stat().st_size > ITERATIVE_THRESHOLD
+            if iterative:
+                yield from iter_json_array(io.TextIOWrapper(f, encoding='utf-8'))
+            else:
+                yield from loads(f.read())
+
+
+def iter_records(path, **options):
+    """Like iter_messages, but yields TelegramMessage records"""
+    for message in iter_messages(path, **options):
+        yield TelegramMessage.from_dict(message)
+
+
+def find_raw_files(folder):
+    """All raw message files in a folder, sorted by name"""
+    folder = Path(folder)
+    return sorted(p for p in folder.iterdir() if p.is_file() and p.name.endswith(RAW_SUFFIXES))
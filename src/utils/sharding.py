@@ -0,0 +1,52 @@
+"""
+Consistent hashing of channels onto Telegram sessions
+A channel keeps its session when sessions are added or removed elsewhere on the ring
+"""
+import bisect
+import hashlib
+
+
+class ConsistentHashRing:
+    def __init__(self, nodes, replicas=100):
+        """
+        Build the ring
+
+        Args:
+            nodes: Session names to place on the ring
+            replicas: Virtual points per node (more points = more even spread)
+        """
+        self.replicas = replicas
+        self._keys = []
+        self._nodes = {}
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(key):
+        return int(hashlib.md5(key.encode('utf-8')).hexdigest()[:16], 16)
+
+    def add_node(self, node):
+        for i in range(self.replicas):
+            point = self._hash(f"{node}#{i}")
+            bisect.insort(self._keys, point)
+            self._nodes[point] = node
+
+    def remove_node(self, node):
+        for i in range(self.replicas):
+            point = self._hash(f"{node}#{i}")
+            self._keys.remove(point)
+            del self._nodes[point]
+
+    def get_node(self, key):
+        """Node responsible for a key (first point clockwise from its hash)"""
+        if not self._keys:
+            raise ValueError("Hash ring has no nodes")
+        index = bisect.bisect(self._keys, self._hash(key.lower())) % len(self._keys)
+        return self._nodes[self._keys[index]]
+
+    def assign(self, keys):
+        """Group keys by responsible node: {node: [keys]}"""
+        assignment = {node: [] for node in set(self._nodes.values())}
+        for key in keys:
+            assignment[self.get_node(key)].append(key)
+        return assignment
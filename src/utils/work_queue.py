@@ -0,0 +1,162 @@
+"""
+Durable channel work queue backed by SQLite
+A coordinator enqueues scrape / backfill tasks; worker processes lease them,
+send heartbeats while working and acknowledge them when done. Tasks whose
+lease expires (crashed worker) are handed out again until max_attempts.
+"""
+import json
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class WorkQueue:
+    def __init__(self, db_path='data/state/work_queue.db', lease_seconds=300, max_attempts=5):
+        """
+        Open (or create) the queue
+
+        Args:
+            db_path: SQLite file shared by the coordinator and all workers
+            lease_seconds: How long a leased task stays reserved without a heartbeat
+            max_attempts: Leases per task before it is marked failed
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        # Autocommit mode; lease() opens its own write transaction
+        self.connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL;")
+        self.create_tables()
+
+    def create_tables(self):
+        """Create the task table if it does not exist"""
+        self.connection.executescript("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            channel_name TEXT NOT NULL,
+            kind TEXT NOT NULL DEFAULT 'scrape',
+            params TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            last_error TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, lease_expires_at);
+        """)
+
+    def enqueue(self, channel_name, kind='scrape', params=None, skip_done=False):
+        """
+        Add a task unless an identical one is already pending or leased
+
+        Args:
+            skip_done: Also skip it when an identical task already finished (for
+                       tasks whose work never needs repeating, like fixed id ranges)
+
+        Returns:
+            New task_id, or None when the task was already queued
+        """
+        params_json = json.dumps(params or {}, sort_keys=True)
+        now = datetime.now().isoformat()
+        statuses = ('pending', 'leased', 'done') if skip_done else ('pending', 'leased')
+
+        existing = self.connection.execute(f"""
+        SELECT task_id FROM tasks
+        WHERE channel_name = ? AND kind = ? AND params = ?
+          AND status IN ({', '.join('?' * len(statuses))});
+        """, (channel_name, kind, params_json, *statuses)).fetchone()
+        if existing:
+            return None
+
+        cursor = self.connection.execute("""
+        INSERT INTO tasks (channel_name, kind, params, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?);
+        """, (channel_name, kind, params_json, now, now))
+        return cursor.lastrowid
+
+    def lease(self, worker_id):
+        """
+        Reserve the oldest available task for a worker
+
+        Pending tasks and leased tasks whose lease expired are both available.
+
+        Returns:
+            Task dict (with params decoded) or None when nothing is available
+        """
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE;")
+        try:
+            row = self.connection.execute("""
+            SELECT * FROM tasks
+            WHERE (status = 'pending' OR (status = 'leased' AND lease_expires_at < ?))
+              AND attempts < ?
+            ORDER BY task_id
+            LIMIT 1;
+            """, (now, self.max_attempts)).fetchone()
+
+            if row is None:
+                # Expired leases that used up their attempts are failed for good
+                self.connection.execute("""
+                UPDATE tasks SET status = 'failed', last_error = COALESCE(last_error, 'lease expired'),
+                                 updated_at = ?
+                WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?;
+                """, (datetime.now().isoformat(), now, self.max_attempts))
+                self.connection.execute("COMMIT;")
+                return None
+
+            self.connection.execute("""
+            UPDATE tasks
+            SET status = 'leased', attempts = attempts + 1, lease_owner = ?,
+                lease_expires_at = ?, updated_at = ?
+            WHERE task_id = ?;
+            """, (worker_id, now + self.lease_seconds, datetime.now().isoformat(), row['task_id']))
+            self.connection.execute("COMMIT;")
+        except Exception:
+            self.connection.execute("ROLLBACK;")
+            raise
+
+        task = dict(row)
+        task['params'] = json.loads(task['params'])
+        task['attempts'] += 1
+        task['lease_owner'] = worker_id
+        return task
+
+    def heartbeat(self, task_id, worker_id):
+        """Extend a lease; returns False if the worker no longer owns the task"""
+        cursor = self.connection.execute("""
+        UPDATE tasks SET lease_expires_at = ?, updated_at = ?
+        WHERE task_id = ? AND lease_owner = ? AND status = 'leased';
+        """, (time.time() + self.lease_seconds, datetime.now().isoformat(), task_id, worker_id))
+        return cursor.rowcount == 1
+
+    def ack(self, task_id, worker_id):
+        """Mark a task as done"""
+        cursor = self.connection.execute("""
+        UPDATE tasks SET status = 'done', lease_expires_at = NULL, updated_at = ?
+        WHERE task_id = ? AND lease_owner = ?;
+        """, (datetime.now().isoformat(), task_id, worker_id))
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, worker_id, error):
+        """Release a task after an error; it is retried until max_attempts"""
+        cursor = self.connection.execute("""
+        UPDATE tasks
+        SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+            lease_owner = NULL, lease_expires_at = NULL, last_error = ?, updated_at = ?
+        WHERE task_id = ? AND lease_owner = ?;
+        """, (self.max_attempts, str(error), datetime.now().isoformat(), task_id, worker_id))
+        return cursor.rowcount == 1
+
+    def stats(self):
+        """Task counts by status"""
+        rows = self.connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status;").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        self.connection.close()
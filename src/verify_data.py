@@ -1,8 +1,13 @@
-import json
 import os
+import sys
 from pathlib import Path
 from datetime import datetime
 
+# Make the project root importable when run as `python src/verify_data.py`
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.raw_io import find_raw_files, iter_messages
+
 def verify_task1():
     """Verify all requirements are met"""
     print("="*60)
@@ -20,8 +25,8 @@ def verify_task1():
     print(f" Data directory: {data_dir}")
     print()
     
-    # Check JSON files
-    json_files = list(data_dir.glob("*.json"))
+    # Check raw message files (.jsonl and legacy .json)
+    json_files = find_raw_files(data_dir)
     print(f" JSON files found: {len(json_files)}")
     
     total_messages = 0
@@ -29,22 +34,25 @@ def verify_task1():
     
     for json_file in json_files:
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            msg_count = 0
+            image_count = 0
+            first_msg = None
             
-            # Count messages
-            msg_count = len(data)
-            total_messages += msg_count
+            # Stream messages so large files are not loaded at once
+            for msg in iter_messages(json_file):
+                if first_msg is None:
+                    first_msg = msg
+                msg_count += 1
+                if msg.get('image_path') and os.path.exists(msg['image_path']):
+                    image_count += 1
             
-            # Count images in this file
-            image_count = sum(1 for msg in data if msg.get('image_path') and os.path.exists(msg['image_path']))
+            total_messages += msg_count
             total_images_downloaded += image_count
             
             print(f"  • {json_file.name}: {msg_count} messages, {image_count} images")
             
             # Check required fields
-            if data:
-                first_msg = data[0]
+            if first_msg:
                 required_fields = ['message_id', 'channel_name', 'message_date', 
                                  'message_text', 'views', 'forwards']
                 missing_fields = [field for field in required_fields if field not in first_msg]
@@ -61,11 +69,11 @@ def verify_task1():
     print(f"  Total images: {total_images_downloaded}")
     
     # Check image directories
-    image_dirs = list(Path("data/raw/images").glob("*"))
+    image_dirs = [d for d in Path("data/raw/images").glob("*") if d.is_dir()]
     print(f"\n  Image directories: {len(image_dirs)}")
     
     for img_dir in image_dirs:
-        image_files = list(img_dir.glob("*.jpg"))
+        image_files = list(img_dir.rglob("*.jpg"))
         print(f"  • {img_dir.name}: {len(image_files)} images")
     
     # Verify logs
@@ -4,6 +4,7 @@ Analyze images and detect objects
 """
 
 import os
+import sys
 import cv2
 import csv
 from pathlib import Path
@@ -12,6 +13,11 @@ import pandas as pd
 from tqdm import tqdm
 import logging
 
+# Make the project root importable when run as `python src/yolo_detect.py`
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.utils.image_store import ImageStore
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -119,18 +125,48 @@ class YOLODetector:
         else:
             return 'other'  # Neither
     
+    def find_images(self, image_dir='data/raw/images'):
+        """
+        Collect images to analyze as (image_path, [(channel_name, message_id), ...])
+        
+        Images in the content-addressed store are listed once with every
+        message that uses them, so duplicates are only run through YOLO once.
+        Legacy files follow the path format data/raw/images/{channel_name}/{message_id}.jpg
+        """
+        images = []
+        
+        # Deduplicated images from the content-addressed store
+        if (Path(image_dir) / 'index.db').exists():
+            store = ImageStore(image_dir)
+            images.extend(store.iter_unique_images())
+            store.close()
+        
+        # Legacy per-channel files
+        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
+        for ext in image_extensions:
+            for image_path in Path(image_dir).rglob(f'*{ext}'):
+                relative_path = image_path.relative_to(image_dir)
+                if relative_path.parts[0] == 'blobs':
+                    continue
+                try:
+                    channel_name = relative_path.parts[0]
+                    message_id = int(image_path.stem)  # Remove .jpg extension
+                except ValueError:
+                    logger.warning(f" Skipping unrecognized image path: {image_path}")
+                    continue
+                images.append((str(image_path), [(channel_name, message_id)]))
+        
+        return images
+    
     def process_all_images(self, image_dir='data/raw/images'):
         """Process all images in the directory structure"""
         logger.info(f" Scanning for images in: {image_dir}")
         
         # Find all image files
-        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp']
-        image_files = []
+        image_files = self.find_images(image_dir)
+        message_count = sum(len(messages) for _, messages in image_files)
         
-        for ext in image_extensions:
-            image_files.extend(Path(image_dir).rglob(f'*{ext}'))
-        
-        logger.info(f" Found {len(image_files)} images to process")
+        logger.info(f" Found {len(image_files)} unique images used by {message_count} messages")
         
         if len(image_files) == 0:
             logger.error(" No images found! Check your image directory.")
@@ -139,14 +175,8 @@ class YOLODetector:
         # Process images
         detection_results = []
         
-        for image_path in tqdm(image_files, desc=" Processing images"):
+        for image_path, messages in tqdm(image_files, desc=" Processing images"):
             try:
-                # Extract channel name and message_id from path
-                # Path format: data/raw/images/{channel_name}/{message_id}.jpg
-                relative_path = image_path.relative_to('data/raw/images')
-                channel_name = relative_path.parts[0]
-                message_id = int(image_path.stem)  # Remove .jpg extension
-                
                 # Detect objects
                 detected_objects = self.detect_objects_in_image(str(image_path))
                 
@@ -163,8 +193,6 @@ class YOLODetector:
                     # Create result entry
                     result = {
                         'image_path': str(image_path),
-                        'channel_name': channel_name,
-                        'message_id': message_id,
                         'detected_objects': ', '.join(object_counts.keys()),
                         'object_count': len(detected_objects),
                         'primary_object': detected_objects[0]['object'] if detected_objects else 'none',
@@ -175,20 +203,16 @@ class YOLODetector:
                         'has_medical': any(obj in object_counts for obj in self.medical_objects)
                     }
                     
-                    detection_results.append(result)
-                    
                     # Log interesting findings
                     if 'person' in object_counts:
-                        logger.debug(f" Person detected in {image_path.name}")
+                        logger.debug(f" Person detected in {Path(image_path).name}")
                     if any(obj in object_counts for obj in self.medical_objects):
-                        logger.debug(f" Medical object detected in {image_path.name}")
+                        logger.debug(f" Medical object detected in {Path(image_path).name}")
                 
                 else:
                     # No objects detected
                     result = {
                         'image_path': str(image_path),
-                        'channel_name': channel_name,
-                        'message_id': message_id,
                         'detected_objects': 'none',
                         'object_count': 0,
                         'primary_object': 'none',
@@ -198,13 +222,21 @@ class YOLODetector:
                         'has_container': False,
                         'has_medical': False
                     }
-                    detection_results.append(result)
+                
+                # One row per message that uses this image
+                for channel_name, message_id in messages:
+                    detection_results.append({
+                        'image_path': result['image_path'],
+                        'channel_name': channel_name,
+                        'message_id': message_id,
+                        **result
+                    })
                 
             except Exception as e:
                 logger.error(f" Error processing {image_path}: {e}")
                 continue
         
-        logger.info(f" Processed {len(detection_results)} images")
+        logger.info(f" Processed {len(image_files)} images into {len(detection_results)} detection rows")
         return detection_results
     
     def save_results(self, detection_results, output_file='data/processed/yolo_detections.csv'):
@@ -0,0 +1,20 @@
+"""Shared fixtures for the unit tests"""
+import pytest
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory: the scraper writes logs/, data/ and config lookups relative to cwd"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    for var in ('RAW_COMPRESSION', 'SCRAPER_PARQUET', 'SCRAPER_IMAGE_SIZE', 'TELEGRAM_SESSIONS_FILE',
+                'CHANNEL_REGISTRY'):
+        monkeypatch.delenv(var, raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def scraper_cls(workdir):
+    """TelegramScraper, imported once logs/ exists (the module opens its log file on import)"""
+    from src.scraper import TelegramScraper
+    return TelegramScraper
@@ -0,0 +1,116 @@
+"""
+In-memory stand-ins for the Telethon client and messages used by the unit tests
+"""
+import asyncio
+import types
+from datetime import datetime, timezone
+
+from telethon.tl.types import Channel, ChatPhotoEmpty, PhotoSize
+
+
+def channel_id(channel_name):
+    """Stable fake Telegram id for a channel username"""
+    return sum(ord(c) * 31 ** i for i, c in enumerate(channel_name)) % 100000 + 1
+
+
+class FakeMessage:
+    def __init__(self, chat_id, message_id, photo=False, grouped_id=None, text='hello'):
+        self.id = message_id
+        self.chat_id = chat_id
+        self.date = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.text = text
+        self.views = 10
+        self.forwards = 1
+        self.grouped_id = grouped_id
+        self.photo = types.SimpleNamespace(
+            id=chat_id * 100000 + message_id,
+            sizes=[PhotoSize(type='x', w=800, h=600, size=1000)]
+        ) if photo else None
+        self.media = self.photo
+
+    async def download_media(self, file=None, thumb=None):
+        await asyncio.sleep(0.01)
+        return b'image-%d' % self.photo.id
+
+
+class FakeClient:
+    """
+    Serves n messages per channel with a fixed latency per API call
+
+    Tracks how many calls are in flight so tests can check concurrency.
+    """
+
+    def __init__(self, n=20, latency=0.01, photos=False):
+        self.n = n
+        self.latency = latency
+        self.photos = photos
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def start(self, phone=None):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def _call(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+    async def get_entity(self, username):
+        await self._call()
+        self.calls.append(('get_entity', username))
+        return Channel(id=channel_id(username), title=username.upper(), photo=ChatPhotoEmpty(),
+                       date=None, access_hash=1, username=username)
+
+    async def get_messages(self, entity, ids=None, limit=None, min_id=0, offset_id=0, **kwargs):
+        await self._call()
+        chat_id = getattr(entity, 'channel_id', None) or entity.id
+        if ids is not None:
+            return [FakeMessage(chat_id, i, photo=self.photos) for i in ids]
+
+        self.calls.append(('get_messages', chat_id, limit, min_id, offset_id))
+        top = offset_id - 1 if offset_id else self.n
+        message_ids = [i for i in range(top, 0, -1) if i > min_id][:limit]
+        return [FakeMessage(chat_id, i, photo=self.photos) for i in message_ids]
+
+
+class ReplayClient(FakeClient):
+    """
+    Replays recorded update events to the registered handlers
+
+    events is a list of (delay seconds, event) pairs; an event with a
+    messages attribute goes to album handlers, any other to message handlers.
+    """
+
+    def __init__(self, events=(), **kwargs):
+        super().__init__(**kwargs)
+        self.events = list(events)
+        self.handlers = []
+
+    def add_event_handler(self, callback, event=None):
+        self.handlers.append((callback, event))
+
+    def remove_event_handler(self, callback):
+        self.handlers = [(c, e) for c, e in self.handlers if c is not callback]
+
+    async def run_until_disconnected(self):
+        for delay, event in self.events:
+            await asyncio.sleep(delay)
+            is_album = hasattr(event, 'messages')
+            for callback, builder in list(self.handlers):
+                if (type(builder).__name__ == 'Album') == is_album:
+                    await callback(event)
+
+
+def new_message_event(message):
+    return types.SimpleNamespace(message=message)
+
+
+def album_event(messages):
+    return types.SimpleNamespace(messages=messages)
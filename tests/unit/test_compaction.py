@@ -0,0 +1,79 @@
+"""Tests for raw lake compaction"""
+import pytest
+
+from src.models.message import TelegramMessage
+from src.utils.compaction import LakeManifest, channel_of, compact_channel, compact_lake, iter_compacted_messages
+from src.utils.raw_io import JsonlWriter
+
+
+def write_raw(path, records):
+    with JsonlWriter(path) as writer:
+        for record in records:
+            writer.write(TelegramMessage(channel_name='alpha', **record))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def plain_files(monkeypatch):
+    monkeypatch.delenv('RAW_COMPRESSION', raising=False)
+
+
+def test_channel_of_strips_backfill_and_range_suffixes():
+    assert channel_of('2026-01-01/alpha.jsonl') == 'alpha'
+    assert channel_of('2026-01-01/alpha_backfill.jsonl.zst') == 'alpha'
+    assert channel_of('2026-01-01/alpha_range_100-200.jsonl.gz') == 'alpha'
+
+
+def test_compaction_keeps_the_latest_scrape_of_each_message(tmp_path):
+    day1 = write_raw(tmp_path / 'raw/2026-01-01/alpha.jsonl', [
+        {'message_id': 1, 'views': 10, 'scraped_at': 1000},
+        {'message_id': 2, 'views': 20, 'scraped_at': 1000},
+    ])
+    day2 = write_raw(tmp_path / 'raw/2026-01-02/alpha.jsonl', [
+        {'message_id': 2, 'views': 25, 'scraped_at': 2000},
+        {'message_id': 3, 'views': 30, 'scraped_at': 2000},
+    ])
+    # An older snapshot read last must not win
+    stale = write_raw(tmp_path / 'raw/2026-01-03/alpha_backfill.jsonl', [
+        {'message_id': 2, 'views': 5, 'scraped_at': 500},
+    ])
+    manifest = LakeManifest(tmp_path / 'compacted')
+
+    assert compact_channel('alpha', [day1, day2, stale], manifest) == 3
+
+    views = {m['message_id']: m['views'] for m in iter_compacted_messages(tmp_path / 'compacted')}
+    assert views == {1: 10, 2: 25, 3: 30}
+
+
+def test_recompaction_merges_new_files_into_existing_segments(tmp_path):
+    root = tmp_path / 'compacted'
+    first = write_raw(tmp_path / 'raw/2026-01-01/alpha.jsonl', [
+        {'message_id': i, 'views': i, 'scraped_at': 1000} for i in range(1, 6)
+    ])
+    compact_channel('alpha', [first], LakeManifest(root), segment_size=2)
+
+    second = write_raw(tmp_path / 'raw/2026-01-02/alpha.jsonl', [
+        {'message_id': 5, 'views': 50, 'scraped_at': 2000},
+        {'message_id': 6, 'views': 60, 'scraped_at': 2000},
+    ])
+    manifest = LakeManifest(root)
+    compact_channel('alpha', [second], manifest, segment_size=2)
+
+    assert [(s['min_message_id'], s['max_message_id'], s['rows']) for s in manifest.segments] == \
+        [(1, 2, 2), (3, 4, 2), (5, 6, 2)]
+    assert sorted(p.name for p in (root / 'alpha').iterdir()) == \
+        ['alpha_1-2.jsonl', 'alpha_3-4.jsonl', 'alpha_5-6.jsonl']
+    views = {m['message_id']: m['views'] for m in iter_compacted_messages(root, min_message_id=5)}
+    assert views == {5: 50, 6: 60}
+
+
+def test_compact_lake_skips_unchanged_sources(tmp_path):
+    raw_root = tmp_path / 'raw'
+    root = tmp_path / 'compacted'
+    write_raw(raw_root / '2026-01-01/alpha.jsonl', [{'message_id': 1, 'scraped_at': 1000}])
+
+    assert compact_lake(raw_root, root) == {'alpha': 1}
+    assert compact_lake(raw_root, root) == {}
+
+    write_raw(raw_root / '2026-01-02/alpha.jsonl', [{'message_id': 2, 'scraped_at': 2000}])
+    assert compact_lake(raw_root, root) == {'alpha': 2}
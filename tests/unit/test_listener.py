@@ -0,0 +1,74 @@
+"""Replay recorded update events through the live listener"""
+import asyncio
+import json
+
+from telethon.tl.types import InputPeerChannel
+from telethon.utils import get_peer_id
+
+from tests.unit.fakes import FakeMessage, ReplayClient, album_event, channel_id, new_message_event
+
+
+def live_message(channel_name, message_id, **kwargs):
+    message = FakeMessage(channel_id(channel_name), message_id, **kwargs)
+    message.chat_id = get_peer_id(InputPeerChannel(channel_id(channel_name), 1))
+    return message
+
+
+def raw_records(workdir, channel_name):
+    files = list((workdir / 'data/raw/telegram_messages').glob(f'*/{channel_name}.jsonl'))
+    return [json.loads(line) for path in files for line in path.read_text().splitlines()]
+
+
+def test_replayed_events_are_stored_and_checkpointed(scraper_cls, workdir):
+    scraper = scraper_cls(channels=['alpha', 'beta'])
+    album = [live_message('alpha', i, photo=True, grouped_id=9, text='caption' if i == 21 else '')
+             for i in (20, 21, 22)]
+    client = ReplayClient(n=0, latency=0, events=[
+        (0, new_message_event(live_message('alpha', 6))),
+        (0, new_message_event(live_message('beta', 6, photo=True))),
+        (0, new_message_event(live_message('gamma', 1))),
+        *[(0, new_message_event(m)) for m in album],
+        (0, album_event(album)),
+        (0.05, new_message_event(live_message('beta', 7))),
+    ])
+
+    asyncio.run(scraper.run_listener(client=client, load_to_postgres=False, catch_up=False,
+                                     batch_size=2, flush_interval=0.2))
+
+    alpha = raw_records(workdir, 'alpha')
+    beta = raw_records(workdir, 'beta')
+    assert [r['message_id'] for r in alpha] == [6, 21]
+    assert alpha[1]['album_message_ids'] == [20, 21, 22]
+    assert len(alpha[1]['image_paths']) == 3
+    assert [r['message_id'] for r in beta] == [6, 7]
+    assert beta[0]['image_path']
+    assert raw_records(workdir, 'gamma') == []
+
+    assert scraper.checkpoints.get('alpha')['last_message_id'] == 22
+    assert scraper.checkpoints.get('beta')['last_message_id'] == 7
+
+
+def test_failed_flush_is_retried_before_checkpointing(scraper_cls, workdir, monkeypatch):
+    scraper = scraper_cls(channels=['alpha'])
+    write_live_batch = scraper.write_live_batch
+    attempts = []
+
+    def flaky_write(batch, loader=None):
+        attempts.append([m.message_id for m in batch])
+        if len(attempts) == 1:
+            raise OSError('disk full')
+        return write_live_batch(batch, loader)
+
+    monkeypatch.setattr(scraper, 'write_live_batch', flaky_write)
+    client = ReplayClient(n=0, latency=0, events=[
+        (0, new_message_event(live_message('alpha', 1))),
+        (0, new_message_event(live_message('alpha', 2))),
+        (0, new_message_event(live_message('alpha', 3))),
+    ])
+
+    asyncio.run(scraper.run_listener(client=client, load_to_postgres=False, catch_up=False,
+                                     batch_size=2, flush_interval=0.2))
+
+    assert attempts == [[1, 2], [1, 2, 3]]
+    assert [r['message_id'] for r in raw_records(workdir, 'alpha')] == [1, 2, 3]
+    assert scraper.checkpoints.get('alpha')['last_message_id'] == 3
@@ -0,0 +1,83 @@
+"""Tests for MicroBatcher"""
+import asyncio
+import threading
+
+from src.utils.micro_batcher import MicroBatcher
+
+
+def test_flushes_full_batches_off_the_event_loop():
+    flushed = []
+    threads = []
+
+    def flush(batch):
+        threads.append(threading.get_ident())
+        flushed.append(batch)
+
+    async def run():
+        batcher = MicroBatcher(flush, max_size=2, max_delay=60)
+        for item in range(5):
+            await batcher.add(item)
+        assert batcher.pending == 1
+        await batcher.flush()
+        return batcher
+
+    batcher = asyncio.run(run())
+
+    assert flushed == [[0, 1], [2, 3], [4]]
+    assert threading.get_ident() not in threads
+    assert (batcher.batches, batcher.items, batcher.pending) == (3, 5, 0)
+
+
+def test_awaits_coroutine_callbacks():
+    flushed = []
+
+    async def flush(batch):
+        await asyncio.sleep(0)
+        flushed.append(batch)
+
+    async def run():
+        batcher = MicroBatcher(flush, max_size=10, max_delay=60)
+        await batcher.add('a')
+        await batcher.flush()
+
+    asyncio.run(run())
+
+    assert flushed == [['a']]
+
+
+def test_failed_batch_is_kept_and_retried():
+    attempts = []
+
+    def flush(batch):
+        attempts.append(list(batch))
+        if len(attempts) == 1:
+            raise OSError('disk full')
+
+    async def run():
+        batcher = MicroBatcher(flush, max_size=2, max_delay=60)
+        await batcher.add(1)
+        await batcher.add(2)
+        assert batcher.pending == 2
+        await batcher.add(3)
+        assert await batcher.flush()
+        return batcher
+
+    batcher = asyncio.run(run())
+
+    assert attempts == [[1, 2], [1, 2, 3]]
+    assert (batcher.batches, batcher.items, batcher.pending) == (1, 3, 0)
+
+
+def test_run_flushes_after_max_delay():
+    flushed = []
+
+    async def run():
+        batcher = MicroBatcher(flushed.append, max_size=100, max_delay=0.05)
+        task = asyncio.create_task(batcher.run())
+        await batcher.add('late')
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+    asyncio.run(run())
+
+    assert flushed == [['late']]
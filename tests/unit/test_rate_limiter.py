@@ -0,0 +1,104 @@
+"""Tests for AdaptiveRateLimiter"""
+import asyncio
+import time
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from src.utils.rate_limiter import AdaptiveRateLimiter
+
+
+def flood_wait(seconds):
+    return FloodWaitError(request=None, capture=seconds)
+
+
+def test_flood_wait_backs_off_and_lowers_the_ceiling():
+    limiter = AdaptiveRateLimiter(rate=10, min_rate=1, max_rate=30)
+
+    limiter.record_flood_wait(0)
+
+    assert limiter.rate == 5
+    assert limiter.ceiling == 9
+    assert limiter.throttle_events == 1
+
+    for _ in range(10):
+        limiter.record_flood_wait(0)
+    assert limiter.rate == 1
+    assert limiter.ceiling == 1
+
+
+def test_sustained_success_recovers_up_to_the_ceiling_then_probes():
+    limiter = AdaptiveRateLimiter(rate=4, max_rate=30, increase_step=1, recovery_after=3)
+    limiter.record_flood_wait(0)
+    assert (limiter.rate, limiter.ceiling) == (2, 3.6)
+
+    for _ in range(2):
+        limiter.record_success()
+    assert limiter.rate == 2
+
+    for _ in range(3):
+        limiter.record_success()
+    assert limiter.rate == 3
+
+    for _ in range(3):
+        limiter.record_success()
+    assert limiter.rate == 3.6
+
+    # At the ceiling the limiter probes above it one step at a time
+    for _ in range(3):
+        limiter.record_success()
+    assert limiter.ceiling == limiter.rate == 4.6
+
+
+def test_flood_wait_blocks_callers_until_it_expires():
+    limiter = AdaptiveRateLimiter(rate=100, burst=10)
+
+    async def run():
+        limiter.record_flood_wait(0.2)
+        started = time.monotonic()
+        await limiter.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.19
+    assert limiter.waited_seconds >= 0.19
+
+
+def test_acquire_paces_requests_beyond_the_burst():
+    limiter = AdaptiveRateLimiter(rate=20, burst=2)
+
+    async def run():
+        started = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+        return time.monotonic() - started
+
+    # Two tokens up front, then one every 1/20 s
+    assert asyncio.run(run()) >= 4 / 20 * 0.9
+    assert limiter.requests == 6
+
+
+def test_call_retries_after_flood_waits():
+    limiter = AdaptiveRateLimiter(rate=100)
+    attempts = []
+
+    async def api_call(value):
+        attempts.append(value)
+        if len(attempts) < 3:
+            raise flood_wait(0)
+        return value * 2
+
+    assert asyncio.run(limiter.call(api_call, 21, retries=3)) == 42
+    assert len(attempts) == 3
+    assert limiter.throttle_events == 2
+
+
+def test_call_raises_once_retries_are_exhausted():
+    limiter = AdaptiveRateLimiter(rate=100)
+
+    async def api_call():
+        raise flood_wait(0)
+
+    with pytest.raises(FloodWaitError):
+        asyncio.run(limiter.call(api_call, retries=1))
+    assert limiter.throttle_events == 2
+    assert limiter.metrics()['throttle_events'] == 2
@@ -0,0 +1,83 @@
+"""Tests for raw file writing and reading"""
+import io
+import json
+
+import pytest
+
+from src.models.message import TelegramMessage
+from src.utils.raw_io import (JsonlWriter, find_raw_files, iter_json_array, iter_messages, iter_records,
+                              raw_stem, raw_suffix)
+
+RECORDS = [
+    {'message_id': i, 'channel_name': 'alpha', 'message_text': f'message {i} – ünïcode', 'views': i * 10}
+    for i in range(1, 6)
+]
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zstd'])
+def test_jsonl_round_trip(tmp_path, compression):
+    path = tmp_path / f'alpha{raw_suffix(compression)}'
+
+    with JsonlWriter(path, fsync_every=2) as writer:
+        for record in RECORDS[:3]:
+            writer.write(record)
+    # A second append adds a new gzip member / zstd frame
+    with JsonlWriter(path) as writer:
+        for record in RECORDS[3:]:
+            writer.write(record)
+
+    assert writer.records == 2
+    assert list(iter_messages(path)) == RECORDS
+    assert raw_stem(path) == 'alpha'
+
+
+def test_writer_accepts_message_records(tmp_path):
+    path = tmp_path / 'alpha.jsonl'
+    message = TelegramMessage(message_id=7, channel_name='alpha', message_text='hi', views=3)
+
+    with JsonlWriter(path) as writer:
+        writer.write(message)
+
+    [record] = list(iter_records(path))
+    assert (record.message_id, record.channel_name, record.message_text, record.views) == (7, 'alpha', 'hi', 3)
+
+
+def test_writer_without_records_leaves_no_file(tmp_path):
+    with JsonlWriter(tmp_path / 'empty.jsonl'):
+        pass
+
+    assert not (tmp_path / 'empty.jsonl').exists()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1 << 20])
+def test_iter_json_array_elements_spanning_chunks(chunk_size):
+    text = json.dumps(RECORDS, indent=4, ensure_ascii=False)
+
+    assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == RECORDS
+
+
+def test_iter_json_array_rejects_non_arrays():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"message_id": 1}')))
+
+
+def test_iter_json_array_raises_on_truncated_input():
+    text = json.dumps(RECORDS)[:-20]
+
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(text), chunk_size=16))
+
+
+@pytest.mark.parametrize('iterative', [False, True])
+def test_iter_messages_reads_legacy_json_arrays(tmp_path, iterative):
+    path = tmp_path / 'alpha.json'
+    path.write_text(json.dumps(RECORDS, indent=2), encoding='utf-8')
+
+    assert list(iter_messages(path, iterative=iterative)) == RECORDS
+
+
+def test_find_raw_files_only_lists_raw_suffixes(tmp_path):
+    for name in ('b.jsonl', 'a.jsonl.zst', 'c.json.gz', 'notes.txt', 'd.parquet'):
+        (tmp_path / name).write_text('')
+
+    assert [p.name for p in find_raw_files(tmp_path)] == ['a.jsonl.zst', 'b.jsonl', 'c.json.gz']
@@ -0,0 +1,80 @@
+"""Tests for concurrent scraping over fake clients"""
+import asyncio
+import time
+
+from src.utils.sharding import ConsistentHashRing
+from tests.unit.fakes import FakeClient
+
+
+class FailingClient(FakeClient):
+    """Fake client that cannot resolve one channel"""
+
+    async def get_entity(self, username):
+        if username == 'broken':
+            await self._call()
+            raise ValueError('No user has "broken" as username')
+        return await super().get_entity(username)
+
+
+def test_scrape_all_runs_channels_concurrently(scraper_cls):
+    channels = [f'channel{i}' for i in range(6)]
+    scraper = scraper_cls(channels=channels, concurrency=3)
+    client = FakeClient(n=5, latency=0.05)
+
+    started = time.monotonic()
+    results = asyncio.run(scraper.scrape_all(client))
+    elapsed = time.monotonic() - started
+
+    assert results == {channel: 5 for channel in channels}
+    assert scraper.progress == {channel: 'done' for channel in channels}
+    assert client.max_in_flight == 3
+    # Two resolve + history rounds per channel; three channels at a time halves the serial time
+    assert elapsed < 6 * 2 * 0.05
+
+
+def test_scrape_all_respects_the_concurrency_limit(scraper_cls):
+    channels = [f'channel{i}' for i in range(4)]
+    scraper = scraper_cls(channels=channels, concurrency=1)
+    client = FakeClient(n=3, latency=0.01)
+
+    asyncio.run(scraper.scrape_all(client))
+
+    assert client.max_in_flight == 1
+
+
+def test_scrape_all_reports_failed_channels(scraper_cls):
+    scraper = scraper_cls(channels=['good', 'broken'], concurrency=2)
+
+    results = asyncio.run(scraper.scrape_all(FailingClient(n=4, latency=0)))
+
+    assert results == {'good': 4, 'broken': 0}
+    assert scraper.progress == {'good': 'done', 'broken': 'failed'}
+    assert scraper.metrics.channel_runs['broken']['status'] == 'failed'
+    assert scraper.checkpoints.get('good')['last_message_id'] == 4
+
+
+def test_incremental_scrape_only_fetches_new_messages(scraper_cls):
+    scraper = scraper_cls(channels=['alpha'])
+    client = FakeClient(n=5, latency=0)
+    asyncio.run(scraper.scrape_all(client))
+
+    client.n = 8
+    results = asyncio.run(scraper.scrape_all(client))
+
+    assert results == {'alpha': 3}
+    assert scraper.checkpoints.get('alpha')['last_message_id'] == 8
+
+
+def test_scrape_shards_sends_each_channel_to_its_ring_node(scraper_cls):
+    channels = [f'channel{i}' for i in range(12)]
+    scraper = scraper_cls(channels=channels)
+    clients = {name: FakeClient(n=2, latency=0) for name in ('s1', 's2', 's3')}
+    scraper.session_names = {c: name for name, c in clients.items()}
+
+    asyncio.run(scraper.scrape_shards(clients, channels))
+
+    assignment = ConsistentHashRing(list(clients)).assign(channels)
+    for name, client in clients.items():
+        resolved = sorted(username for op, username in (c[:2] for c in client.calls) if op == 'get_entity')
+        assert resolved == sorted(assignment[name])
+    assert scraper.progress == {channel: 'done' for channel in channels}
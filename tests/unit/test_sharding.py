@@ -0,0 +1,51 @@
+"""Tests for ConsistentHashRing"""
+import pytest
+
+from src.utils.sharding import ConsistentHashRing
+
+CHANNELS = [f'channel{i}' for i in range(300)]
+
+
+def test_every_channel_is_assigned_to_exactly_one_session():
+    assignment = ConsistentHashRing(['s1', 's2', 's3', 's4']).assign(CHANNELS)
+
+    assert sorted(assignment) == ['s1', 's2', 's3', 's4']
+    assert sorted(c for shard in assignment.values() for c in shard) == sorted(CHANNELS)
+    # Virtual nodes keep shards roughly even
+    assert all(40 <= len(shard) <= 110 for shard in assignment.values())
+
+
+def test_assignment_is_stable_and_case_insensitive():
+    ring = ConsistentHashRing(['s1', 's2', 's3'])
+    other = ConsistentHashRing(['s3', 's1', 's2'])
+
+    for channel in CHANNELS:
+        assert ring.get_node(channel) == other.get_node(channel) == ring.get_node(channel.upper())
+
+
+def test_adding_a_session_only_moves_channels_to_it():
+    before = ConsistentHashRing(['s1', 's2', 's3'])
+    after = ConsistentHashRing(['s1', 's2', 's3', 's4'])
+
+    moved = [c for c in CHANNELS if before.get_node(c) != after.get_node(c)]
+
+    assert moved
+    assert all(after.get_node(c) == 's4' for c in moved)
+
+
+def test_removing_a_session_only_moves_its_channels():
+    ring = ConsistentHashRing(['s1', 's2', 's3'])
+    before = {c: ring.get_node(c) for c in CHANNELS}
+
+    ring.remove_node('s2')
+
+    for channel, node in before.items():
+        if node != 's2':
+            assert ring.get_node(channel) == node
+        else:
+            assert ring.get_node(channel) in ('s1', 's3')
+
+
+def test_empty_ring_raises():
+    with pytest.raises(ValueError):
+        ConsistentHashRing([]).get_node('channel')
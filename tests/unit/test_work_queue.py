@@ -0,0 +1,99 @@
+"""Tests for the SQLite work queue"""
+import time
+
+import pytest
+
+from src.utils.work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(tmp_path / 'queue.db', lease_seconds=60, max_attempts=2)
+    yield queue
+    queue.close()
+
+
+def expire_leases(queue):
+    queue.connection.execute("UPDATE tasks SET lease_expires_at = ?;", (time.time() - 1,))
+
+
+def test_enqueue_skips_duplicates(queue):
+    assert queue.enqueue('alpha') is not None
+    assert queue.enqueue('alpha') is None
+    assert queue.enqueue('alpha', 'backfill', {'chunk_size': 500}) is not None
+    assert queue.stats() == {'pending': 2}
+
+
+def test_skip_done_does_not_requeue_finished_tasks(queue):
+    params = {'offset_id': 100, 'min_id': 0}
+    task_id = queue.enqueue('alpha', 'range', params, skip_done=True)
+    queue.lease('w1')
+    queue.ack(task_id, 'w1')
+
+    assert queue.enqueue('alpha', 'range', params, skip_done=True) is None
+    assert queue.enqueue('alpha', 'range', params) is not None
+
+
+def test_lease_hands_out_each_task_once(queue):
+    queue.enqueue('alpha')
+    queue.enqueue('beta')
+
+    first = queue.lease('w1')
+    second = queue.lease('w2')
+
+    assert (first['channel_name'], second['channel_name']) == ('alpha', 'beta')
+    assert first['lease_owner'] == 'w1'
+    assert first['attempts'] == 1
+    assert queue.lease('w3') is None
+
+
+def test_heartbeat_only_extends_the_owners_lease(queue):
+    queue.enqueue('alpha')
+    task = queue.lease('w1')
+
+    assert queue.heartbeat(task['task_id'], task['lease_owner'])
+    assert not queue.heartbeat(task['task_id'], 'w2')
+
+    assert queue.ack(task['task_id'], 'w1')
+    assert not queue.heartbeat(task['task_id'], 'w1')
+    assert queue.stats() == {'done': 1}
+
+
+def test_expired_lease_is_taken_over(queue):
+    queue.enqueue('alpha')
+    task = queue.lease('w1')
+    expire_leases(queue)
+
+    retried = queue.lease('w2')
+
+    assert retried['task_id'] == task['task_id']
+    assert retried['attempts'] == 2
+    # The first worker lost the task and can no longer ack it
+    assert not queue.ack(task['task_id'], 'w1')
+    assert queue.ack(task['task_id'], 'w2')
+
+
+def test_failed_task_is_retried_until_max_attempts(queue):
+    queue.enqueue('alpha')
+
+    task = queue.lease('w1')
+    assert queue.fail(task['task_id'], 'w1', 'boom')
+    assert queue.stats() == {'pending': 1}
+
+    task = queue.lease('w1')
+    queue.fail(task['task_id'], 'w1', 'boom again')
+
+    assert queue.lease('w1') is None
+    assert queue.stats() == {'failed': 1}
+
+
+def test_expired_lease_without_attempts_left_is_failed(queue):
+    queue.enqueue('alpha')
+    for _ in range(2):
+        queue.lease('w1')
+        expire_leases(queue)
+
+    assert queue.lease('w2') is None
+    assert queue.stats() == {'failed': 1}
+    last_error = queue.connection.execute("SELECT last_error FROM tasks;").fetchone()[0]
+    assert last_error == 'lease expired'